@@ -0,0 +1,73 @@
+"""
+Benchmark: attaching before/after image lists to components.
+
+Compares the original per-component list scans over the whole image
+result (O(components x images)) with the single-pass
+report_data.group_images used by the component endpoints and the PDF
+loader. Pure CPU, no database needed.
+
+Usage:
+    python benchmarks/bench_image_grouping.py [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import report_data
+
+COMPONENT_COUNTS = [100, 500, 1000, 3000, 5000]
+IMAGES_PER_COMPONENT = 6
+
+
+def make_rows(num_components: int):
+    components = [{"comp_id": c} for c in range(1, num_components + 1)]
+    images = [
+        {"comp_id": c, "image_path": f"{c}_{i}.jpg", "image_type": "before" if i % 2 == 0 else "after"}
+        for c in range(1, num_components + 1)
+        for i in range(IMAGES_PER_COMPONENT)
+    ]
+    return components, images
+
+
+def attach_scan(components, images):
+    """The original get_all_components mapping"""
+    for component in components:
+        component['before_images'] = [img['image_path'] for img in images
+                                     if img['comp_id'] == component['comp_id'] and img['image_type'] == 'before']
+        component['after_images'] = [img['image_path'] for img in images
+                                    if img['comp_id'] == component['comp_id'] and img['image_type'] == 'after']
+
+
+def attach_grouped(components, images):
+    images_by_comp = report_data.group_images(images)
+    for component in components:
+        component.update(report_data.image_paths(images_by_comp.get(component['comp_id'], report_data.EMPTY_IMAGES)))
+
+
+def best_of(func, components, images, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(components, images)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(repeat: int):
+    print(f"{'components':>10} | {'images':>7} | {'scan ms':>10} | {'grouped ms':>10} | {'speedup':>8}")
+    print("-" * 58)
+    for count in COMPONENT_COUNTS:
+        components, images = make_rows(count)
+        scan_ms = best_of(attach_scan, components, images, repeat)
+        grouped_ms = best_of(attach_grouped, components, images, repeat)
+        print(f"{count:>10} | {len(images):>7} | {scan_ms:>10.2f} | {grouped_ms:>10.2f} | {scan_ms / grouped_ms:>7.0f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per size (best is reported)")
+    args = parser.parse_args()
+    run(args.repeat)
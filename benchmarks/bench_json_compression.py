@@ -0,0 +1,118 @@
+"""
+Benchmark: JSON list responses with compression and conditional GET.
+
+Serves GET /api/scheme from the real app (CompressionMiddleware, list
+ETags) over in-memory rows and compares, per page size:
+
+- payload bytes: identity vs gzip (and brotli when installed)
+- request latency: full identity body, compressed body, and a 304 for
+  a repeat poll with If-None-Match
+
+The database functions are replaced with in-memory rows, so this
+measures serialization, compression and the 304 short-circuit only; on
+a real server the 304 also skips the list query. No database needed.
+
+Usage:
+    python benchmarks/bench_json_compression.py [--repeat 20]
+"""
+import argparse
+import asyncio
+import datetime
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+import compression
+import database
+import main
+
+# Page sizes (?limit=), up to MAX_PAGE_SIZE
+ROW_COUNTS = [10, 100, 250, 500]
+
+
+def make_schemes(count: int):
+    now = datetime.datetime(2024, 1, 1, 12, 0)
+    return [
+        {
+            "gs_no": gs_no,
+            "sr_no": gs_no,
+            "name_of_scheme": f"Construction of community hall and approach road, ward {gs_no % 40}",
+            "starting_date": datetime.date(2023, 4, 1),
+            "physical_progress": Decimal("62.50"),
+            "total_allocation": Decimal("1500000.00"),
+            "funds_released": Decimal("900000.00"),
+            "committed_fund_utilization": Decimal("850000.00"),
+            "labour_deployed": 24,
+            "remarks": "Work in progress; plinth complete, superstructure started",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for gs_no in range(1, count + 1)
+    ]
+
+
+def use_rows(rows):
+    """Point the app's database calls at in-memory rows"""
+    version = {"data_version": 1, "row_count": len(rows), "max_updated_at": rows[-1]["updated_at"]}
+    columns = list(rows[0])
+    tuples = [tuple(row.values()) for row in rows]
+
+    async def fetch_rows(query, params=None):
+        return columns, tuples
+
+    async def fetch_one(query, params=None):
+        return version
+
+    database.fetch_rows = fetch_rows
+    database.fetch_one = fetch_one
+
+
+async def best_of(client: httpx.AsyncClient, count: int, headers: dict, repeat: int):
+    best, response = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get("/api/scheme", params={"limit": count}, headers=headers)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, response
+
+
+async def run(repeat: int):
+    encodings = ["gzip"] + (["br"] if compression.encoding_available("br") else [])
+    transport = httpx.ASGITransport(app=main.app)
+    # Keep the endpoint's per-request log lines out of the table
+    main.print = lambda *args, **kwargs: None
+
+    header = f"{'rows':>6} | {'identity B':>10} | " + " | ".join(f"{e + ' B':>9}" for e in encodings)
+    header += f" | {'full ms':>8} | " + " | ".join(f"{e + ' ms':>8}" for e in encodings) + f" | {'304 ms':>7}"
+    print(header)
+    print("-" * len(header))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for count in ROW_COUNTS:
+            use_rows(make_schemes(count))
+            full_ms, full = await best_of(client, count, {"Accept-Encoding": "identity"}, repeat)
+            sizes, timings = [], []
+            for encoding in encodings:
+                ms, response = await best_of(client, count, {"Accept-Encoding": encoding}, repeat)
+                assert response.headers.get("content-encoding") == encoding
+                # httpx decodes the body; Content-Length is the size on the wire
+                sizes.append(int(response.headers["content-length"]))
+                timings.append(ms)
+            not_modified_ms, response = await best_of(client, count, {"If-None-Match": full.headers["etag"]}, repeat)
+            assert response.status_code == 304
+
+            line = f"{count:>6} | {len(full.content):>10} | " + " | ".join(f"{s:>9}" for s in sizes)
+            line += f" | {full_ms:>8.2f} | " + " | ".join(f"{t:>8.2f}" for t in timings) + f" | {not_modified_ms:>7.2f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per measurement (best is reported)")
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat))
@@ -0,0 +1,127 @@
+"""
+Benchmark: serializing the /api/scheme and /api/component list responses.
+
+Compares, for the same rows:
+
+- before: DictCursor-style dict rows, copied per row, run through
+  jsonable_encoder (and ComponentResponse validation for components)
+  and rendered by JSONResponse
+- after: cursor tuples -> json_rows.records -> json_rows.ORJSONResponse
+
+Reports the best time over --repeat runs and tracemalloc's peak traced
+memory for one run. Pure CPU, no database needed.
+
+Usage:
+    python benchmarks/bench_list_serialization.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import datetime
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+import json_rows
+import main
+
+SCHEME_COLUMNS = [
+    "gs_no", "sr_no", "name_of_scheme", "starting_date", "physical_progress", "total_allocation", "funds_released",
+    "committed_fund_utilization", "labour_deployed", "remarks", "created_at", "updated_at"
+]
+COMPONENT_COLUMNS = ["comp_id", "component_name", "starting_date", "created_at", "gs_no", "is_active"]
+
+
+def scheme_rows(count: int) -> List[tuple]:
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+    return [
+        (
+            gs_no, gs_no, f"Construction of community hall and approach road, ward {gs_no % 40}",
+            datetime.date(2023, 4, 1), Decimal("62.50"), Decimal("1500000.00"), Decimal("900000.00"),
+            Decimal("850000.00"), 24, "Work in progress; plinth complete, superstructure started", now, now,
+        )
+        for gs_no in range(1, count + 1)
+    ]
+
+
+def component_rows(count: int) -> List[tuple]:
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+    return [(comp_id, f"Foundation work, block {comp_id}", "2024-02-01", now, comp_id // 5, 1) for comp_id in range(1, count + 1)]
+
+
+def with_images(component: dict) -> dict:
+    component["before_images"] = [f"{component['comp_id']}_b.jpg"]
+    component["after_images"] = [f"{component['comp_id']}_a.jpg"]
+    return component
+
+
+component_list = TypeAdapter(List[main.ComponentResponse])
+
+
+def schemes_before(columns, rows):
+    dict_rows = [dict(zip(columns, row)) for row in rows]  # DictCursor
+    content = [dict(s) for s in dict_rows]
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def schemes_after(columns, rows):
+    return json_rows.ORJSONResponse(content=json_rows.records(columns, rows, columns)).body
+
+
+def components_before(columns, rows):
+    dict_rows = [with_images(dict(zip(columns, row))) for row in rows]  # DictCursor
+    validated = component_list.validate_python(dict_rows)  # response_model=List[ComponentResponse]
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def components_after(columns, rows):
+    components = json_rows.records(columns, rows, columns)
+    for component in components:
+        component["is_active"] = bool(component["is_active"])
+        with_images(component)
+    return json_rows.ORJSONResponse(content=components).body
+
+
+def measure(func, columns, rows, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func(columns, rows)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(columns, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024, len(body)
+
+
+def run(count: int, repeat: int):
+    cases = [
+        ("schemes", SCHEME_COLUMNS, scheme_rows(count), schemes_before, schemes_after),
+        ("components", COMPONENT_COLUMNS, component_rows(count), components_before, components_after),
+    ]
+    print(f"{count} rows, best of {repeat}")
+    print(f"{'endpoint':>10} | {'path':>6} | {'ms':>8} | {'peak MiB':>8} | {'body B':>9}")
+    print("-" * 54)
+    for name, columns, rows, before, after in cases:
+        before_ms, before_peak, before_size = measure(before, columns, rows, repeat)
+        after_ms, after_peak, after_size = measure(after, columns, rows, repeat)
+        print(f"{name:>10} | {'before':>6} | {before_ms:>8.1f} | {before_peak:>8.1f} | {before_size:>9}")
+        print(f"{name:>10} | {'after':>6} | {after_ms:>8.1f} | {after_peak:>8.1f} | {after_size:>9}")
+        print(f"{'':>10} | {'':>6} | {before_ms / after_ms:>7.1f}x | {before_peak / after_peak:>7.1f}x |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per list")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path (best is reported)")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,120 @@
+"""
+Benchmark: xhtml2pdf (templates/report.html) vs direct ReportLab report rendering.
+
+Builds one synthetic portfolio with generated JPEG "report renditions" in
+a temp directory and renders the full report, the summary table alone
+and the image pages alone with each backend in-process (no render pool),
+printing the best wall time, page count and PDF size. No database needed.
+
+Run from the repository root: xhtml2pdf only reads images under the
+current directory, so the temp images are created there.
+
+Usage:
+    python benchmarks/bench_report_backends.py [--schemes 200] [--repeat 3]
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image
+from pypdf import PdfReader
+
+import render_worker
+import report_data
+
+COMPONENTS_PER_SCHEME = 3
+PAIRS_PER_COMPONENT = 2
+DISTINCT_IMAGES = 40
+
+
+def make_images(directory: Path) -> list:
+    """JPEGs shaped like 800px report renditions"""
+    rng = random.Random(7)
+    paths = []
+    for i in range(DISTINCT_IMAGES):
+        image = Image.new("RGB", (800, 600), tuple(rng.randrange(256) for _ in range(3)))
+        for _ in range(40):
+            x, y = rng.randrange(760), rng.randrange(560)
+            image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 40, y + 40))
+        path = directory / f"{i}.jpg"
+        image.save(path, "JPEG", quality=82)
+        paths.append(str(path))
+    return paths
+
+
+def make_schemes(num_schemes: int, images: list) -> list:
+    schemes = []
+    for g in range(1, num_schemes + 1):
+        components = []
+        for c in range(COMPONENTS_PER_SCHEME):
+            pairs = []
+            for p in range(PAIRS_PER_COMPONENT):
+                before = images[(g * 7 + c * 3 + p) % len(images)]
+                after = images[(g * 5 + c + p * 11) % len(images)]
+                pairs.append(({"path": before, "full_path": before}, {"path": after, "full_path": after}))
+            components.append({
+                "component_name": f"Component {c + 1} of scheme {g}",
+                "starting_date": date(2025, 1 + c, 1),
+                "is_active": True,
+                "image_pairs": pairs,
+            })
+        schemes.append({
+            "gs_no": 1000 + g,
+            "name_of_scheme": f"Rehabilitation of heritage site {g}",
+            "physical_progress": Decimal(g % 101),
+            "total_allocation": Decimal("125.50"),
+            "funds_released": Decimal("80.00"),
+            "committed_fund_utilization": Decimal("64.25"),
+            "labour_deployed": 25,
+            "remarks": "Civil works in progress; finishing and landscaping pending.",
+            "components": components,
+        })
+    return schemes
+
+
+def best_of(backend: str, context: dict, work_dir: Path, repeat: int):
+    best = float('inf')
+    dest = str(work_dir / f"{backend}.pdf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # Same worker entry point the report fragments use
+        size = render_worker.report_to_file(backend, context, dest)
+        best = min(best, time.perf_counter() - start)
+    return best, len(PdfReader(dest).pages), size
+
+
+def run(num_schemes: int, repeat: int):
+    work_dir = Path(tempfile.mkdtemp(prefix=".bench_report_", dir=Path.cwd()))
+    try:
+        schemes = make_schemes(num_schemes, make_images(work_dir))
+        context = report_data.report_context(schemes)
+        print(f"{num_schemes} schemes, {num_schemes * COMPONENTS_PER_SCHEME * PAIRS_PER_COMPONENT} image pages\n")
+        print(f"{'sections':>10} | {'backend':>10} | {'seconds':>8} | {'pages':>6} | {'size KB':>8}")
+        print("-" * 55)
+        for label, sections in [("full", None), ("summary", ["summary"]), ("images", ["images"])]:
+            section_context = context if sections is None else {**context, "sections": sections}
+            timings = {}
+            for backend in render_worker.REPORT_BACKENDS:
+                seconds, pages, size = best_of(backend, section_context, work_dir, repeat)
+                timings[backend] = seconds
+                print(f"{label:>10} | {backend:>10} | {seconds:>8.2f} | {pages:>6} | {size / 1024:>8.0f}")
+            print(f"{'':>10}   reportlab speedup: {timings['xhtml2pdf'] / timings['reportlab']:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=200, help="Schemes in the synthetic portfolio")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend (best is reported)")
+    args = parser.parse_args()
+    run(args.schemes, args.repeat)
@@ -0,0 +1,109 @@
+"""
+Benchmark: per-scheme N+1 report loading vs the batched report_data loader.
+
+Replaces database.fetch_all with an in-memory fake that simulates a fixed
+round-trip latency per query, then prints query count and wall time for
+both strategies at increasing scheme counts. Rendition lookups are stubbed
+out (the fake image paths don't exist), so only query and grouping work
+is timed.
+
+Usage:
+    python benchmarks/bench_report_loader.py [--latency-ms 0.5]
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database
+import image_renditions
+import report_data
+
+SCHEME_COUNTS = [10, 50, 100, 300, 1000]
+COMPONENTS_PER_SCHEME = 4
+IMAGES_PER_COMPONENT = 6
+
+
+class FakeDB:
+    """In-memory stand-in for database.fetch_all that counts queries"""
+
+    def __init__(self, num_schemes: int, latency: float):
+        self.latency = latency
+        self.queries = 0
+        self.schemes = [{"gs_no": g, "name_of_scheme": f"Scheme {g}"} for g in range(1, num_schemes + 1)]
+        self.components = []
+        self.images = []
+        comp_id = 0
+        img_id = 0
+        for scheme in self.schemes:
+            for _ in range(COMPONENTS_PER_SCHEME):
+                comp_id += 1
+                self.components.append({"comp_id": comp_id, "gs_no": scheme["gs_no"], "is_active": True})
+                for i in range(IMAGES_PER_COMPONENT):
+                    img_id += 1
+                    self.images.append({
+                        "id": img_id,
+                        "comp_id": comp_id,
+                        "image_path": f"{img_id}.jpg",
+                        "image_type": "before" if i % 2 == 0 else "after",
+                    })
+
+    async def fetch_all(self, query: str, params: tuple = None):
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        params = params or ()
+        table = re.search(r"FROM (\w+)", query).group(1)
+        rows = {"scheme": self.schemes, "component": self.components, "component_images": self.images}[table]
+        if "WHERE" not in query:
+            return [dict(r) for r in rows]
+        column = re.search(r"WHERE (\w+)", query).group(1)
+        wanted = set(params)
+        return [dict(r) for r in rows if r[column] in wanted]
+
+
+async def load_n_plus_one():
+    """The original per-scheme / per-component query pattern"""
+    schemes = await database.fetch_all("SELECT * FROM scheme ORDER BY gs_no")
+    for scheme in schemes:
+        comps = await database.fetch_all("SELECT * FROM component WHERE gs_no = %s ORDER BY comp_id", (scheme['gs_no'],))
+        for comp in comps:
+            images = await database.fetch_all(
+                "SELECT image_path, image_type FROM component_images WHERE comp_id = %s",
+                (comp['comp_id'],)
+            )
+            comp['image_pairs'] = report_data.build_image_pairs(report_data.split_images(images))
+        scheme['components'] = comps
+    return schemes
+
+
+def no_renditions(images, name):
+    """Stand-in for image_renditions.ensure_renditions: embed the originals"""
+    return {}
+
+
+async def run(latency: float):
+    image_renditions.ensure_renditions = no_renditions
+    print(f"{'schemes':>8} | {'n+1 queries':>11} | {'n+1 ms':>9} | {'batched queries':>15} | {'batched ms':>10}")
+    print("-" * 66)
+    for count in SCHEME_COUNTS:
+        results = []
+        for loader in (load_n_plus_one, report_data.load_report_data):
+            fake = FakeDB(count, latency)
+            database.fetch_all = fake.fetch_all
+            start = time.perf_counter()
+            await loader()
+            elapsed = (time.perf_counter() - start) * 1000
+            results.append((fake.queries, elapsed))
+        (n1_q, n1_ms), (b_q, b_ms) = results
+        print(f"{count:>8} | {n1_q:>11} | {n1_ms:>9.1f} | {b_q:>15} | {b_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Simulated round-trip latency per query")
+    args = parser.parse_args()
+    asyncio.run(run(args.latency_ms / 1000))
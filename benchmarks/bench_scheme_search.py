@@ -0,0 +1,144 @@
+"""
+Benchmark: LIKE '%term%' scheme filtering vs the FULLTEXT scheme_search path.
+
+Needs a reachable MySQL server (DB_* settings from .env). Creates a scratch
+database next to the configured one, copies the scheme/component table
+definitions, fills them with synthetic rows at each size and times the
+original LIKE filter against the indexed filter and ranked search.
+
+Usage:
+    python benchmarks/bench_scheme_search.py [--sizes 10000 100000] [--repeat 20] [--keep]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import aiomysql
+
+import database
+import scheme_search
+from config import DB_CONFIG
+
+WORDS = [
+    "dharabi", "lake", "dam", "taxila", "museum", "bhera", "changa", "manga", "jallo", "park",
+    "kallar", "kahar", "baradari", "fort", "road", "bridge", "restoration", "heritage", "resort",
+    "tourist", "facilitation", "centre", "parking", "walkway", "lighting", "canal", "garden",
+    "mosque", "shrine", "hotel", "trail", "camping", "boating", "signage", "washroom", "rest",
+]
+COMPONENTS_PER_SCHEME = 3
+
+# Search box values: typical words, partial words while typing, and two-word queries
+TERMS = ["dharabi", "muse", "restoration", "kallar kah", "parking lighting", "zzz"]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+async def admin_execute(sql: str):
+    conn = await aiomysql.connect(
+        host=DB_CONFIG['host'], port=DB_CONFIG['port'],
+        user=DB_CONFIG['user'], password=DB_CONFIG['password'],
+        charset=DB_CONFIG['charset'], autocommit=True
+    )
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(sql)
+    finally:
+        conn.close()
+
+
+async def populate(size: int, rng: random.Random):
+    await database.execute("DELETE FROM component")
+    await database.execute("DELETE FROM scheme")
+    schemes = [
+        (gs_no, gs_no, f"{sentence(rng, 3)} {gs_no}", sentence(rng, 12))
+        for gs_no in range(1, size + 1)
+    ]
+    components = [
+        (sentence(rng, 2), gs_no)
+        for gs_no in range(1, size + 1)
+        for _ in range(COMPONENTS_PER_SCHEME)
+    ]
+    for start in range(0, size, 5000):
+        await database.execute_many(
+            "INSERT INTO scheme (gs_no, sr_no, name_of_scheme, remarks) VALUES (%s, %s, %s, %s)",
+            schemes[start:start + 5000]
+        )
+    for start in range(0, len(components), 5000):
+        await database.execute_many(
+            "INSERT INTO component (component_name, gs_no) VALUES (%s, %s)",
+            components[start:start + 5000]
+        )
+    await database.execute("ANALYZE TABLE scheme, component")
+
+
+async def like_filter(term: str):
+    """The original get_all_schemes name filter"""
+    return await database.fetch_all(
+        "SELECT * FROM scheme WHERE 1=1 AND name_of_scheme LIKE %s ORDER BY gs_no",
+        (f"%{term}%",)
+    )
+
+
+async def fulltext_filter(term: str):
+    condition, params = scheme_search.filter_condition(term)
+    return await database.fetch_all(f"SELECT * FROM scheme WHERE 1=1 AND {condition} ORDER BY gs_no", tuple(params))
+
+
+async def ranked_search(term: str):
+    return await scheme_search.search(term, 20)
+
+
+async def time_query(func, term: str, repeat: int) -> tuple:
+    rows = await func(term)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func(term)
+        samples.append((time.perf_counter() - start) * 1000)
+    return len(rows), statistics.median(samples)
+
+
+async def run(sizes, repeat: int, keep: bool):
+    bench_db = f"{DB_CONFIG['db']}_search_bench"
+    await admin_execute(f"CREATE DATABASE IF NOT EXISTS {bench_db}")
+    await admin_execute(f"CREATE TABLE IF NOT EXISTS {bench_db}.scheme LIKE {DB_CONFIG['db']}.scheme")
+    await admin_execute(f"CREATE TABLE IF NOT EXISTS {bench_db}.component LIKE {DB_CONFIG['db']}.component")
+
+    source_db = DB_CONFIG['db']
+    DB_CONFIG['db'] = bench_db
+    await database.create_pool()
+    try:
+        await scheme_search.ensure_indexes()
+        rng = random.Random(42)
+        print(f"{'schemes':>8} | {'term':<18} | {'LIKE rows':>9} | {'LIKE ms':>8} | {'FT rows':>7} | {'FT ms':>7} | {'ranked ms':>9}")
+        print("-" * 84)
+        for size in sizes:
+            await populate(size, rng)
+            for term in TERMS:
+                like_rows, like_ms = await time_query(like_filter, term, repeat)
+                ft_rows, ft_ms = await time_query(fulltext_filter, term, repeat)
+                _, ranked_ms = await time_query(ranked_search, term, repeat)
+                print(f"{size:>8} | {term:<18} | {like_rows:>9} | {like_ms:>8.2f} | {ft_rows:>7} | {ft_ms:>7.2f} | {ranked_ms:>9.2f}")
+        print("\nLIKE rows only count name substring matches; FT rows also include remarks and component names.")
+    finally:
+        await database.close_pool()
+        DB_CONFIG['db'] = source_db
+        if not keep:
+            await admin_execute(f"DROP DATABASE IF EXISTS {bench_db}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Scheme counts to test")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query (median is reported)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat, args.keep))
@@ -0,0 +1,124 @@
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import COMPRESS_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+
+# Brotli is optional (pip install brotli); gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' from an Accept-Encoding header, preferring brotli, None if neither is accepted"""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON responses with brotli or gzip (per Accept-Encoding) when
+    the body is at least minimum_size bytes
+
+    Other content types (PDFs, images, streamed downloads) pass through
+    untouched. Compressed responses get a weak ETag, since the bytes differ
+    from the identity encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.chunks = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            content_type.startswith(COMPRESSIBLE_TYPES)
+            and "content-encoding" not in headers
+            and self.start_message["status"] not in (204, 206, 304)
+        )
+
+    async def send_wrapper(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        # JSON responses are built in memory anyway; collect the body, then decide
+        self.chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+        body = b"".join(self.chunks)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+
+        if len(body) >= self.minimum_size:
+            body, encoding = compress(body, self.encoding), self.encoding
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": body, "more_body": False})
+
+
+def encoding_available(encoding: str) -> bool:
+    """Whether this process can produce the given Content-Encoding"""
+    return encoding == 'gzip' or (encoding == 'br' and brotli is not None)
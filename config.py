@@ -24,9 +24,13 @@ UPLOAD_DIR = BASE_DIR / 'uploads'
 BEFORE_IMAGE_DIR = UPLOAD_DIR / 'before'
 AFTER_IMAGE_DIR = UPLOAD_DIR / 'after'
 
-# Create upload directories if they don't exist
+# Generated report artifacts
+REPORT_DIR = BASE_DIR / 'reports'
+
+# Create upload and report directories if they don't exist
 BEFORE_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
 AFTER_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Allowed image formats
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -34,6 +38,14 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 # Max file size (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Max number of files in one batch upload request
+MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', 50))
+
+# Largest page a paginated list endpoint will return (?limit=)
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+# Page size when ?limit= is omitted, so an unbounded list is never returned in one response
+DEFAULT_PAGE_SIZE = min(int(os.getenv('DEFAULT_PAGE_SIZE', 100)), MAX_PAGE_SIZE)
+
 # CORS settings
 CORS_ORIGINS = [
     "http://localhost:3000",
@@ -45,3 +57,93 @@ CORS_ORIGINS = [
     "http://127.0.0.1:5174",
     "http://127.0.0.1:5175",
 ]
+
+# Templates
+TEMPLATE_DIR = BASE_DIR / 'templates'
+
+# PDF render worker pool
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', os.cpu_count() or 2))
+RENDER_MAX_CONCURRENCY = int(os.getenv('RENDER_MAX_CONCURRENCY', RENDER_WORKERS))
+RENDER_TIMEOUT = float(os.getenv('RENDER_TIMEOUT', 300))
+# PDF report backend: 'xhtml2pdf' (templates/report.html) or 'reportlab' (drawn directly, faster)
+REPORT_BACKEND = os.getenv('REPORT_BACKEND', 'xhtml2pdf')
+
+# Downloads (report PDFs) are streamed from disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', 256 * 1024))
+
+# JSON response compression (brotli when the optional `brotli` package is installed, else gzip)
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes; smaller bodies aren't worth it
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))  # 0-11; higher compresses more but costs CPU per request
+
+# Report jobs: an active job not updated for this long is treated as dead
+REPORT_JOB_STALE_SECONDS = int(os.getenv('REPORT_JOB_STALE_SECONDS', 2 * RENDER_TIMEOUT + 60))
+
+# Report PDF cache
+REPORT_CACHE_DIR = REPORT_DIR / 'cache'
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 20))
+REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Per-section report fragments (cover, summary table, one per scheme's image pages)
+REPORT_FRAGMENT_DIR = REPORT_CACHE_DIR / 'fragments'
+REPORT_FRAGMENT_CACHE_MAX_BYTES = int(os.getenv('REPORT_FRAGMENT_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+REPORT_FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_FRAGMENT_CACHE_MAX_ENTRIES', 5000))
+REPORT_FRAGMENT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Image renditions (downscaled JPEG copies stored next to the originals)
+RENDITIONS_DIRNAME = 'renditions'
+RENDITION_SIZES = {
+    'report': int(os.getenv('REPORT_RENDITION_SIZE', 800)),
+    'thumb': int(os.getenv('THUMB_RENDITION_SIZE', 320)),
+}
+RENDITION_JPEG_QUALITY = int(os.getenv('RENDITION_JPEG_QUALITY', 82))
+
+# Modern-format copies of every upload and rendition, served to browsers that accept them
+VARIANTS_DIRNAME = 'variants'
+IMAGE_VARIANT_FORMATS = [f.strip().lower() for f in os.getenv('IMAGE_VARIANT_FORMATS', 'avif,webp').split(',') if f.strip()]
+IMAGE_VARIANT_QUALITY = {
+    'avif': int(os.getenv('AVIF_QUALITY', 60)),
+    'webp': int(os.getenv('WEBP_QUALITY', 80)),
+}
+
+# /uploads caching: originals are content-named and never rewritten
+UPLOAD_CACHE_MAX_AGE = int(os.getenv('UPLOAD_CACHE_MAX_AGE', 365 * 24 * 3600))
+RENDITION_CACHE_MAX_AGE = int(os.getenv('RENDITION_CACHE_MAX_AGE', 24 * 3600))  # renditions are regenerated when settings change
+
+# Upstream HTTP APIs (SMDP and Tourism proxies)
+UPSTREAMS = {
+    'smdp': {
+        'timeout': float(os.getenv('SMDP_TIMEOUT', 30)),
+        'max_connections': int(os.getenv('SMDP_MAX_CONNECTIONS', 10)),
+    },
+    'tourism': {
+        'timeout': float(os.getenv('TOURISM_TIMEOUT', 30)),
+        'max_connections': int(os.getenv('TOURISM_MAX_CONNECTIONS', 10)),
+    },
+}
+UPSTREAM_CACHE_TTL = float(os.getenv('UPSTREAM_CACHE_TTL', 60))
+UPSTREAM_CACHE_STALE_TTL = float(os.getenv('UPSTREAM_CACHE_STALE_TTL', 600))
+UPSTREAM_CACHE_MAX_ENTRIES = int(os.getenv('UPSTREAM_CACHE_MAX_ENTRIES', 512))
+
+# SMDP scheme sync
+SMDP_SYNC_PAGE_SIZE = int(os.getenv('SMDP_SYNC_PAGE_SIZE', 500))
+SMDP_SYNC_PAGE_CONCURRENCY = int(os.getenv('SMDP_SYNC_PAGE_CONCURRENCY', 4))
+SMDP_SYNC_BATCH_SIZE = int(os.getenv('SMDP_SYNC_BATCH_SIZE', 500))
+
+# Portfolio statistics cache; entries are also dropped whenever the data version changes
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', 300))
+
+# Database connection pool
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))  # seconds, -1 never recycles
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 10))
+DB_PRE_PING_IDLE = float(os.getenv('DB_PRE_PING_IDLE', 30))  # ping connections idle this long on acquire, 0 always, -1 never
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 500))
+
+# Background removal of unreferenced image files
+FILE_CLEANUP_MAX_ATTEMPTS = int(os.getenv('FILE_CLEANUP_MAX_ATTEMPTS', 5))
+FILE_CLEANUP_RETRY_DELAY = float(os.getenv('FILE_CLEANUP_RETRY_DELAY', 30))  # seconds, doubles per attempt
+ORPHAN_SWEEP_INTERVAL = float(os.getenv('ORPHAN_SWEEP_INTERVAL', 6 * 3600))  # seconds, 0 disables
+ORPHAN_GRACE_SECONDS = float(os.getenv('ORPHAN_GRACE_SECONDS', 24 * 3600))  # uploads younger than this are never swept
@@ -1,26 +1,74 @@
+import asyncio
+import bisect
+import re
+import time
 import aiomysql
 from contextlib import asynccontextmanager
-from typing import Optional, List, Dict, Any
-from config import DB_CONFIG
+from typing import Optional, List, Dict, Any, Tuple
+from config import (
+    DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_RECYCLE, DB_CONNECT_TIMEOUT,
+    DB_PRE_PING_IDLE, DB_SLOW_QUERY_MS
+)
 
 # Global connection pool
 pool: Optional[aiomysql.Pool] = None
 
+# Serializes pool creation so concurrent first requests don't each create one
+_pool_lock = asyncio.Lock()
+
+
+class Histogram:
+    """Cumulative latency histogram in milliseconds (Prometheus-style buckets)"""
+
+    BUCKETS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.BUCKETS + ['+Inf'], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum_ms": round(self.sum, 3), "buckets": buckets}
+
+
+# Pool and query instrumentation, read through metrics()
+acquire_wait = Histogram()
+query_latency = Histogram()
+counters = {
+    "queries": 0, "query_errors": 0, "slow_queries": 0, "pings": 0, "ping_failures": 0,
+    "transactions": 0, "rollbacks": 0,
+}
+
 
 async def create_pool():
-    """Create database connection pool"""
+    """Create database connection pool (once, even under concurrent callers)"""
     global pool
-    pool = await aiomysql.create_pool(
-        host=DB_CONFIG['host'],
-        port=DB_CONFIG['port'],
-        user=DB_CONFIG['user'],
-        password=DB_CONFIG['password'],
-        db=DB_CONFIG['db'],
-        charset=DB_CONFIG['charset'],
-        autocommit=DB_CONFIG['autocommit'],
-        minsize=1,
-        maxsize=10
-    )
+    async with _pool_lock:
+        if pool:
+            return pool
+        pool = await aiomysql.create_pool(
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['db'],
+            charset=DB_CONFIG['charset'],
+            autocommit=DB_CONFIG['autocommit'],
+            minsize=DB_POOL_MIN_SIZE,
+            maxsize=DB_POOL_MAX_SIZE,
+            pool_recycle=DB_POOL_RECYCLE,
+            connect_timeout=DB_CONNECT_TIMEOUT
+        )
     return pool
 
 
@@ -30,19 +78,136 @@ async def close_pool():
     if pool:
         pool.close()
         await pool.wait_closed()
+        pool = None
+
+
+async def _pre_ping(conn: aiomysql.Connection):
+    """Ping a connection that sat idle, reconnecting if the server dropped it"""
+    if DB_PRE_PING_IDLE < 0:
+        return
+    idle = asyncio.get_running_loop().time() - conn.last_usage
+    if idle < DB_PRE_PING_IDLE:
+        return
+    counters["pings"] += 1
+    try:
+        await conn.ping(reconnect=True)
+    except Exception:
+        counters["ping_failures"] += 1
+        raise
 
 
 @asynccontextmanager
 async def get_db_connection():
     """Context manager for database connections"""
-    global pool
     if not pool:
         await create_pool()
     
+    start = time.perf_counter()
     async with pool.acquire() as conn:
+        acquire_wait.observe((time.perf_counter() - start) * 1000)
+        await _pre_ping(conn)
         yield conn
 
 
+def _record_query(query: str, started: float, failed: bool):
+    ms = (time.perf_counter() - started) * 1000
+    query_latency.observe(ms)
+    counters["queries"] += 1
+    if failed:
+        counters["query_errors"] += 1
+    if ms >= DB_SLOW_QUERY_MS:
+        counters["slow_queries"] += 1
+        sql = re.sub(r"\s+", " ", query).strip()
+        print(f"🐢 Slow query ({ms:.0f} ms): {sql[:1000]}")
+
+
+def metrics() -> Dict[str, Any]:
+    """Pool state, acquire wait and query latency for the /metrics endpoint"""
+    return {
+        "pool": {
+            "size": pool.size if pool else 0,
+            "free": pool.freesize if pool else 0,
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+        },
+        "acquire_wait_ms": acquire_wait.snapshot(),
+        "query_latency_ms": query_latency.snapshot(),
+        **counters,
+    }
+
+
+def metrics_text() -> str:
+    """metrics() in Prometheus text exposition format"""
+    snapshot = metrics()
+    lines = [
+        f"db_pool_size {snapshot['pool']['size']}",
+        f"db_pool_free {snapshot['pool']['free']}",
+        f"db_pool_max_size {snapshot['pool']['max_size']}",
+    ]
+    for name in counters:
+        lines.append(f"db_{name}_total {snapshot[name]}")
+    for name in ("acquire_wait_ms", "query_latency_ms"):
+        histogram = snapshot[name]
+        lines.append(f"# TYPE db_{name} histogram")
+        for bound, count in histogram["buckets"].items():
+            lines.append(f'db_{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f"db_{name}_sum {histogram['sum_ms']}")
+        lines.append(f"db_{name}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+async def _run_query(
+    conn: aiomysql.Connection, query: str, params: tuple = None,
+    fetch_one: bool = False, fetch_all: bool = False, commit: bool = True
+) -> Any:
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        started = time.perf_counter()
+        failed = True
+        try:
+            await cursor.execute(query, params or ())
+            
+            if fetch_one:
+                result = await cursor.fetchone()
+            elif fetch_all:
+                result = await cursor.fetchall()
+            else:
+                if commit:
+                    await conn.commit()
+                result = cursor.lastrowid
+            failed = False
+            return result
+        finally:
+            _record_query(query, started, failed)
+
+
+async def _run_rows(conn: aiomysql.Connection, query: str, params: tuple = None) -> Tuple[List[str], List[tuple]]:
+    async with conn.cursor() as cursor:
+        started = time.perf_counter()
+        failed = True
+        try:
+            await cursor.execute(query, params or ())
+            rows = await cursor.fetchall()
+            columns = [column[0] for column in cursor.description or ()]
+            failed = False
+            return columns, list(rows or ())
+        finally:
+            _record_query(query, started, failed)
+
+
+async def _run_many(conn: aiomysql.Connection, query: str, params_list: List[tuple], commit: bool = True) -> int:
+    async with conn.cursor() as cursor:
+        started = time.perf_counter()
+        failed = True
+        try:
+            await cursor.executemany(query, params_list)
+            if commit:
+                await conn.commit()
+            failed = False
+            return cursor.rowcount
+        finally:
+            _record_query(query, started, failed)
+
+
 async def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = False) -> Any:
     """
     Execute a SQL query and return results
@@ -57,16 +222,7 @@ async def execute_query(query: str, params: tuple = None, fetch_one: bool = Fals
         Query result or None
     """
     async with get_db_connection() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cursor:
-            await cursor.execute(query, params or ())
-            
-            if fetch_one:
-                return await cursor.fetchone()
-            elif fetch_all:
-                return await cursor.fetchall()
-            else:
-                await conn.commit()
-                return cursor.lastrowid
+        return await _run_query(conn, query, params, fetch_one, fetch_all)
 
 
 async def execute_many(query: str, params_list: List[tuple]) -> int:
@@ -81,10 +237,7 @@ async def execute_many(query: str, params_list: List[tuple]) -> int:
         Number of affected rows
     """
     async with get_db_connection() as conn:
-        async with conn.cursor() as cursor:
-            await cursor.executemany(query, params_list)
-            await conn.commit()
-            return cursor.rowcount
+        return await _run_many(conn, query, params_list)
 
 
 async def fetch_one(query: str, params: tuple = None) -> Optional[Dict]:
@@ -98,6 +251,96 @@ async def fetch_all(query: str, params: tuple = None) -> List[Dict]:
     return result if result else []
 
 
+async def fetch_rows(query: str, params: tuple = None) -> Tuple[List[str], List[tuple]]:
+    """
+    Fetch all rows as plain tuples, with the column names in cursor order
+
+    Skips the per-row dict DictCursor builds, for large list responses
+    that are turned straight into JSON (see json_rows.records).
+    """
+    async with get_db_connection() as conn:
+        return await _run_rows(conn, query, params)
+
+
 async def execute(query: str, params: tuple = None) -> Any:
     """Execute query without fetching results"""
     return await execute_query(query, params)
+
+
+class Transaction:
+    """
+    Statements run on one connection inside a transaction
+
+    Has the same execute/execute_many/fetch_one/fetch_all/fetch_rows methods as this
+    module, so helpers taking a `db` argument work with either.
+    """
+
+    def __init__(self, conn: aiomysql.Connection):
+        self.conn = conn
+
+    async def execute(self, query: str, params: tuple = None) -> Any:
+        """Execute query without fetching results, returns lastrowid"""
+        return await _run_query(self.conn, query, params, commit=False)
+
+    async def execute_many(self, query: str, params_list: List[tuple]) -> int:
+        """Execute a query with multiple parameter sets, returns affected rows"""
+        return await _run_many(self.conn, query, params_list, commit=False)
+
+    async def fetch_one(self, query: str, params: tuple = None) -> Optional[Dict]:
+        """Fetch single row"""
+        return await _run_query(self.conn, query, params, fetch_one=True)
+
+    async def fetch_all(self, query: str, params: tuple = None) -> List[Dict]:
+        """Fetch all rows"""
+        result = await _run_query(self.conn, query, params, fetch_all=True)
+        return result if result else []
+
+    async def fetch_rows(self, query: str, params: tuple = None) -> Tuple[List[str], List[tuple]]:
+        """Fetch all rows as tuples plus column names"""
+        return await _run_rows(self.conn, query, params)
+
+
+@asynccontextmanager
+async def transaction():
+    """
+    Run several statements on one pooled connection with a single commit
+
+    Commits when the block exits normally and rolls back if it raises
+    (including HTTPException), so a request never leaves half-applied
+    writes behind.
+
+    Example:
+        async with database.transaction() as tx:
+            comp_id = await tx.execute("INSERT INTO component ...", params)
+            await tx.execute_many("INSERT INTO component_images ...", rows)
+    """
+    async with get_db_connection() as conn:
+        await conn.begin()
+        try:
+            yield Transaction(conn)
+        except BaseException:
+            await conn.rollback()
+            counters["rollbacks"] += 1
+            raise
+        await conn.commit()
+        counters["transactions"] += 1
+
+
+@asynccontextmanager
+async def named_lock(name: str, timeout: float = 0):
+    """
+    Hold a MySQL named lock (GET_LOCK) for the duration of the block
+
+    Coordinates work that must run in only one worker process at a time.
+    Yields True if the lock was acquired within timeout seconds, False otherwise.
+    """
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+            (locked,) = await cursor.fetchone()
+        try:
+            yield locked == 1
+        finally:
+            if locked == 1:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
@@ -10,7 +10,13 @@ CREATE TABLE scheme (
     labour_deployed INT,
     remarks TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_scheme_sr_no (sr_no),
+    INDEX idx_scheme_name_of_scheme (name_of_scheme),
+    INDEX idx_scheme_physical_progress (physical_progress),
+    INDEX idx_scheme_total_allocation (total_allocation),
+    INDEX idx_scheme_updated_at (updated_at),
+    FULLTEXT INDEX ft_scheme_text (name_of_scheme, remarks)
 );
 
 -- Component Table
@@ -23,6 +29,10 @@ CREATE TABLE component (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     gs_no INT,
     is_active BOOLEAN DEFAULT TRUE,
+    INDEX idx_component_gs_no_comp_id (gs_no, comp_id),
+    INDEX idx_component_component_name (component_name),
+    INDEX idx_component_created_at (created_at),
+    FULLTEXT INDEX ft_component_name (component_name),
     FOREIGN KEY (gs_no) REFERENCES scheme(gs_no)
 );
 
@@ -32,6 +42,52 @@ CREATE TABLE component_images (
     comp_id INT,
     image_path VARCHAR(255),
     image_type ENUM('before', 'after'),
+    sort_order INT NOT NULL DEFAULT 0, -- display order within (comp_id, image_type)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_component_images_order (comp_id, image_type, sort_order),
     FOREIGN KEY (comp_id) REFERENCES component(comp_id) ON DELETE CASCADE
 );
+
+-- Report Jobs Table (async PDF generation)
+CREATE TABLE report_job (
+    job_id CHAR(36) PRIMARY KEY,
+    job_key VARCHAR(64) NOT NULL,
+    active_key VARCHAR(64) UNIQUE, -- job_key while queued/running, NULL once finished
+    params TEXT,
+    status ENUM('queued', 'loading', 'rendering', 'completed', 'failed') DEFAULT 'queued',
+    schemes_loaded INT DEFAULT 0,
+    total_pages INT,
+    pages_rendered INT DEFAULT 0,
+    file_path VARCHAR(255),
+    file_size BIGINT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL
+);
+
+-- Data Version Table (bumped by every scheme/component/image write; keys report caches)
+CREATE TABLE data_version (
+    name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Image File Index (content-addressed uploads shared by reference count)
+CREATE TABLE image_file (
+    image_type ENUM('before', 'after') NOT NULL,
+    image_path VARCHAR(255) NOT NULL,
+    sha256 CHAR(64),
+    size BIGINT,
+    ref_count INT NOT NULL DEFAULT 0, -- number of component_images rows using this file
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- refreshed by duplicate uploads; the orphan sweep's grace period
+    PRIMARY KEY (image_type, image_path)
+);
+
+-- Schema Migrations (versions applied by migrations.py)
+CREATE TABLE schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
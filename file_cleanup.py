@@ -0,0 +1,299 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Optional, List, Tuple, Iterable, Dict, Set
+
+import database
+import image_renditions
+from config import (
+    BEFORE_IMAGE_DIR, AFTER_IMAGE_DIR, RENDITIONS_DIRNAME, VARIANTS_DIRNAME,
+    FILE_CLEANUP_MAX_ATTEMPTS, FILE_CLEANUP_RETRY_DELAY, ORPHAN_SWEEP_INTERVAL, ORPHAN_GRACE_SECONDS
+)
+
+# Only one process sweeps at a time
+SWEEP_LOCK_NAME = "report_api_orphan_sweep"
+
+IMAGE_DIRS = {'before': BEFORE_IMAGE_DIR, 'after': AFTER_IMAGE_DIR}
+
+# (image_type, image_path, attempt) waiting for removal
+_queue: "asyncio.Queue[Tuple[str, str, int]]" = None
+_worker: Optional[asyncio.Task] = None
+_sweeper: Optional[asyncio.Task] = None
+_retries: set = set()
+
+stats = {"deleted": 0, "skipped_referenced": 0, "retries": 0, "failed": 0, "last_sweep": None}
+
+
+def delete_file(image_type: str, image_path: str) -> bool:
+    """
+    Remove an upload, its renditions and variants
+
+    Returns:
+        True if the original existed. Raises OSError for anything but a missing file.
+    """
+    existed = True
+    try:
+        image_renditions.original_path(image_type, image_path).unlink()
+    except FileNotFoundError:
+        existed = False
+    for path in image_renditions.derived_paths(image_type, image_path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    return existed
+
+
+async def still_referenced(
+    images: List[Tuple[str, str]], registered_is_live: bool = False, uploaded_within: float = 0
+) -> Set[Tuple[str, str]]:
+    """
+    The subset of images used by a component or registered with live references
+
+    With registered_is_live, any image_file row counts: release_references
+    deletes the row of a released file, so a row that is back means the
+    file was uploaded again (ref_count 0 until the client attaches it).
+    With uploaded_within, so do rows uploaded in the last that many seconds.
+    """
+    if not images:
+        return set()
+    conditions = ' OR '.join(['(image_type = %s AND image_path = %s)'] * len(images))
+    params = tuple(value for image in images for value in image)
+    registered, registered_params = "", ()
+    if not registered_is_live:
+        registered = "ref_count > 0 AND "
+        if uploaded_within > 0:
+            registered = "(ref_count > 0 OR last_uploaded_at > NOW() - INTERVAL %s SECOND) AND "
+            registered_params = (int(uploaded_within),)
+    rows = await database.fetch_all(
+        f"""
+            SELECT image_type, image_path FROM component_images WHERE {conditions}
+            UNION
+            SELECT image_type, image_path FROM image_file WHERE {registered}({conditions})
+        """,
+        params + registered_params + params
+    )
+    return {(row['image_type'], row['image_path']) for row in rows}
+
+
+def enqueue(images: Iterable[Tuple[str, str]]):
+    """
+    Queue released images for removal after the releasing transaction committed
+
+    Falls back to deleting inline when the worker isn't running (scripts, tests).
+    """
+    images = list(images)
+    if not images:
+        return
+    if _queue is None or _worker is None or _worker.done():
+        for image_type, image_path in images:
+            try:
+                delete_file(image_type, image_path)
+            except OSError as e:
+                print(f"⚠️ Warning: Error deleting image file {image_path}: {e}")
+        return
+    for image_type, image_path in images:
+        _queue.put_nowait((image_type, image_path, 1))
+
+
+def _schedule_retry(item: Tuple[str, str, int]):
+    image_type, image_path, attempt = item
+    delay = FILE_CLEANUP_RETRY_DELAY * 2 ** (attempt - 1)
+
+    async def retry():
+        await asyncio.sleep(delay)
+        _queue.put_nowait((image_type, image_path, attempt + 1))
+
+    task = asyncio.create_task(retry())
+    _retries.add(task)
+    task.add_done_callback(_retries.discard)
+
+
+async def _process(batch: List[Tuple[str, str, int]]):
+    # A file released by one request may have been re-uploaded or attached
+    # again (same content hash, same name) before its turn came
+    try:
+        referenced = await still_referenced([(t, p) for t, p, _ in batch], registered_is_live=True)
+    except Exception as e:
+        print(f"⚠️ Warning: File cleanup could not check references: {e}")
+        for item in batch:
+            _schedule_retry(item)
+        return
+
+    for item in batch:
+        image_type, image_path, attempt = item
+        if (image_type, image_path) in referenced:
+            stats["skipped_referenced"] += 1
+            continue
+        try:
+            if await asyncio.to_thread(delete_file, image_type, image_path):
+                print(f"   - Deleted {image_type} image file: {image_path}")
+            stats["deleted"] += 1
+        except OSError as e:
+            if attempt >= FILE_CLEANUP_MAX_ATTEMPTS:
+                stats["failed"] += 1
+                print(f"❌ Giving up deleting {image_type}/{image_path} after {attempt} attempts: {e} (the orphan sweep will retry)")
+            else:
+                stats["retries"] += 1
+                print(f"⚠️ Warning: Error deleting {image_type}/{image_path} (attempt {attempt}): {e}")
+                _schedule_retry(item)
+
+
+async def _run_worker():
+    while True:
+        batch = [await _queue.get()]
+        while not _queue.empty() and len(batch) < 500:
+            batch.append(_queue.get_nowait())
+        try:
+            await _process(batch)
+        except Exception as e:
+            print(f"❌ File cleanup worker error: {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+# ============== Orphan sweep ==============
+
+def _scan_uploads(grace_seconds: float) -> Tuple[List[Tuple[str, str]], List[Path]]:
+    """
+    Uploads older than the grace period, and stale temp/rendition files
+
+    Returns:
+        Tuple of ((image_type, filename) originals, leftover paths to remove outright)
+    """
+    cutoff = time.time() - grace_seconds
+    originals = []
+    leftovers = []
+    for image_type, directory in IMAGE_DIRS.items():
+        existing = set()
+        for path in directory.iterdir():
+            if not path.is_file():
+                continue
+            existing.add(path.stem)
+            if path.stat().st_mtime > cutoff:
+                continue
+            if path.name.startswith('.'):
+                # Interrupted streaming uploads (.<uuid>.part)
+                leftovers.append(path)
+            else:
+                originals.append((image_type, path.name))
+
+        # Renditions whose original is gone, and interrupted rendition writes (*.tmp),
+        # whatever their name shares with a live original
+        renditions_dir = directory / RENDITIONS_DIRNAME
+        if renditions_dir.is_dir():
+            for path in renditions_dir.glob("*/*"):
+                orphaned = path.suffix == '.tmp' or path.stem not in existing
+                if path.is_file() and orphaned and path.stat().st_mtime <= cutoff:
+                    leftovers.append(path)
+
+        # Variants (<source name>.<fmt>) whose source is gone, and interrupted variant writes
+        for variants_dir in [directory / VARIANTS_DIRNAME, *renditions_dir.glob(f"*/{VARIANTS_DIRNAME}")]:
+            if not variants_dir.is_dir():
+                continue
+            for path in variants_dir.iterdir():
+                orphaned = path.suffix == '.tmp' or not (variants_dir.parent / path.stem).exists()
+                if path.is_file() and orphaned and path.stat().st_mtime <= cutoff:
+                    leftovers.append(path)
+    return originals, leftovers
+
+
+async def sweep(grace_seconds: float = ORPHAN_GRACE_SECONDS, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Reconcile uploads/ with component_images
+
+    Removes uploads no component references (including uploads that were
+    never attached) once they are older than grace_seconds, plus leftover
+    temp files and renditions. Candidates are re-checked against the
+    database right before removal.
+
+    Returns:
+        Counts of scanned files, removed orphans and leftovers
+    """
+    async with database.named_lock(SWEEP_LOCK_NAME) as locked:
+        if not locked:
+            print("ℹ️ Orphan sweep already running in another worker")
+            return {"scanned": 0, "orphans": 0, "leftovers": 0}
+
+        originals, leftovers = await asyncio.to_thread(_scan_uploads, grace_seconds)
+        referenced = set()
+        for row in await database.fetch_all("SELECT DISTINCT image_type, image_path FROM component_images"):
+            referenced.add((row['image_type'], row['image_path']))
+        candidates = [image for image in originals if image not in referenced]
+
+        orphans = []
+        for start in range(0, len(candidates), 500):
+            batch = candidates[start:start + 500]
+            # Duplicate uploads reuse the stored file without touching it; their
+            # upload time is in image_file instead of the file's mtime
+            live = await still_referenced(batch, uploaded_within=grace_seconds)
+            orphans.extend(image for image in batch if image not in live)
+
+        if not dry_run:
+            for image_type, image_path in orphans:
+                try:
+                    await asyncio.to_thread(delete_file, image_type, image_path)
+                except OSError as e:
+                    print(f"⚠️ Warning: Orphan sweep could not delete {image_type}/{image_path}: {e}")
+            if orphans:
+                await database.execute_many(
+                    "DELETE FROM image_file WHERE image_type = %s AND image_path = %s AND ref_count <= 0",
+                    orphans
+                )
+            for path in leftovers:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"⚠️ Warning: Orphan sweep could not delete {path}: {e}")
+
+    result = {"scanned": len(originals), "orphans": len(orphans), "leftovers": len(leftovers)}
+    stats["last_sweep"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    print(f"🧹 Orphan sweep{' (dry run)' if dry_run else ''}: {result}")
+    return result
+
+
+async def _run_sweeper():
+    while True:
+        await asyncio.sleep(ORPHAN_SWEEP_INTERVAL)
+        try:
+            await sweep()
+        except Exception as e:
+            print(f"❌ Orphan sweep failed: {e}")
+
+
+def start():
+    """Start the cleanup worker (and the periodic orphan sweep if enabled)"""
+    global _queue, _worker, _sweeper
+    _queue = asyncio.Queue()
+    _worker = asyncio.create_task(_run_worker())
+    if ORPHAN_SWEEP_INTERVAL > 0:
+        _sweeper = asyncio.create_task(_run_sweeper())
+
+
+async def stop(timeout: float = 10):
+    """Finish queued deletions (up to timeout seconds) and stop the background tasks"""
+    global _worker, _sweeper
+    if _queue is not None and _worker is not None:
+        try:
+            await asyncio.wait_for(_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Warning: {_queue.qsize()} image deletions left for the orphan sweep")
+    for task in [_worker, _sweeper, *_retries]:
+        if task:
+            task.cancel()
+    _worker = _sweeper = None
+
+
+if __name__ == '__main__':
+    async def _main():
+        await database.create_pool()
+        try:
+            await sweep(dry_run='--dry-run' in sys.argv)
+        finally:
+            await database.close_pool()
+
+    asyncio.run(_main())
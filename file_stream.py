@@ -0,0 +1,43 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional, BinaryIO, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from config import DOWNLOAD_CHUNK_SIZE
+
+
+async def iter_file(file: BinaryIO, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an open file in fixed-size chunks off the event loop, closing it at the end"""
+    try:
+        while True:
+            chunk = await asyncio.to_thread(file.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await asyncio.to_thread(file.close)
+
+
+async def stream_file(
+    path: Path,
+    media_type: str,
+    filename: Optional[str] = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE
+) -> StreamingResponse:
+    """
+    Stream a file from disk with Content-Length, holding at most one chunk in memory
+
+    The file is opened before returning, so it can still be sent if it is
+    replaced or evicted (e.g. from the report cache) while streaming.
+
+    Raises:
+        FileNotFoundError: if path doesn't exist
+    """
+    file = await asyncio.to_thread(open, path, "rb")
+    size = os.fstat(file.fileno()).st_size
+    headers = {"Content-Length": str(size)}
+    if filename:
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(iter_file(file, chunk_size), media_type=media_type, headers=headers)
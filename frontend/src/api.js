@@ -7,12 +7,26 @@ const api = axios.create({
     baseURL: API_BASE_URL,
 });
 
+// List endpoints return one page per request; follow X-Next-Cursor until the last page
+const getAllPages = async (url, params = {}) => {
+    const response = await api.get(url, { params });
+    const data = [...response.data];
+    let cursor = response.headers['x-next-cursor'];
+    while (cursor) {
+        const page = await api.get(url, { params: { ...params, cursor } });
+        data.push(...page.data);
+        cursor = page.headers['x-next-cursor'];
+    }
+    return { ...response, data };
+};
+
 export const schemeService = {
-    getAll: (params = {}) => api.get('/scheme', { params }),
+    getAll: (params = {}) => getAllPages('/scheme', { limit: 500, ...params }),
     getOne: (id) => api.get(`/scheme/${id}`),
     create: (data) => api.post('/scheme', data),
     update: (id, data) => api.put(`/scheme/${id}`, data),
     delete: (id) => api.delete(`/scheme/${id}`),
+    getStats: () => api.get('/stats'),
     getExternalProject: (gsNo, filterID = '1') => api.get('/get_project', { params: { gsNo, filterID } }),
     getProjectStructure: (projectId) => api.get(`/get_project_structure/${projectId}`),
     getProjectDetails: (projectId) => api.get(`/get_project_details/${projectId}`),
@@ -21,7 +35,7 @@ export const schemeService = {
 };
 
 export const componentService = {
-    getAll: (gs_no) => api.get('/component', { params: { gs_no } }),
+    getAll: (gs_no) => getAllPages('/component', { gs_no, limit: 500 }),
     getOne: (id) => api.get(`/component/${id}`),
     create: (data) => api.post('/component', data),
     update: (id, data) => api.put(`/component/${id}`, data),
@@ -44,6 +58,15 @@ export const uploadService = {
             headers: { 'Content-Type': 'multipart/form-data' },
         });
     },
+    uploadBatch: ({ before = [], after = [], compId } = {}) => {
+        const formData = new FormData();
+        before.forEach((file) => formData.append('before', file));
+        after.forEach((file) => formData.append('after', file));
+        if (compId) formData.append('comp_id', compId);
+        return api.post('/upload/batch', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' },
+        });
+    },
 };
 
 export const getImageUrl = (path, type) => {
@@ -52,7 +52,7 @@ const Dashboard = () => {
         setLoading(true);
         try {
             const params = {};
-            if (searchTerm) params.name = searchTerm;
+            if (searchTerm) params.q = searchTerm;
             if (filterScheme) params.name = filterScheme;
 
             const response = await schemeService.getAll(params);
@@ -0,0 +1,75 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request, Response
+
+import database
+
+# Cheap per-list version probes: the data version counter bumped by every API write,
+# plus row counts and high-water marks that also move on writes made outside the API
+LIST_VERSION_QUERIES = {
+    "scheme": """
+        SELECT
+            (SELECT version FROM data_version WHERE name = 'report') AS data_version,
+            COUNT(*) AS row_count,
+            MAX(updated_at) AS max_updated_at
+        FROM scheme
+    """,
+    "component": """
+        SELECT
+            (SELECT version FROM data_version WHERE name = 'report') AS data_version,
+            (SELECT COUNT(*) FROM component) AS row_count,
+            (SELECT MAX(comp_id) FROM component) AS max_comp_id,
+            (SELECT COUNT(*) FROM component_images) AS image_count,
+            (SELECT MAX(id) FROM component_images) AS max_image_id
+    """,
+}
+
+# Clients may reuse a stored list but must revalidate it with If-None-Match first
+CACHE_CONTROL = "no-cache"
+
+
+async def list_etag(name: str, request: Request) -> Optional[str]:
+    """
+    ETag for a list endpoint response: its data version plus the query string
+
+    Returns None when the version can't be read, so the caller serves the
+    list without one.
+    """
+    try:
+        row = await database.fetch_one(LIST_VERSION_QUERIES[name])
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read {name} list version: {e}")
+        return None
+    parts = {"version": {k: str(v) for k, v in (row or {}).items()}, "query": str(request.query_params)}
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:32]
+    return f'"{name}-{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison: compressed responses carry W/ versions of the same tag
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """Whether the request's If-None-Match already matches etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching conditional GET"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: Optional[str]):
+    """Attach the list ETag and revalidation policy to a response"""
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+from config import UPSTREAMS, UPSTREAM_CACHE_TTL, UPSTREAM_CACHE_STALE_TTL, UPSTREAM_CACHE_MAX_ENTRIES
+
+# Shared keep-alive clients and concurrency limits, one per upstream
+clients: Dict[str, httpx.AsyncClient] = {}
+semaphores: Dict[str, asyncio.Semaphore] = {}
+
+# cache key -> (fresh_until, stale_until, status_code, payload), in LRU order
+_cache: "OrderedDict[str, Tuple[float, float, int, Any]]" = OrderedDict()
+
+# cache key -> in-flight upstream request, so concurrent misses share one call
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Strong references to background revalidation tasks
+_refreshes: set = set()
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """Return the pooled client for an upstream, creating it on first use"""
+    if upstream not in clients:
+        settings = UPSTREAMS[upstream]
+        clients[upstream] = httpx.AsyncClient(
+            timeout=settings['timeout'],
+            limits=httpx.Limits(
+                max_connections=settings['max_connections'],
+                max_keepalive_connections=settings['max_connections']
+            )
+        )
+        semaphores[upstream] = asyncio.Semaphore(settings['max_connections'])
+    return clients[upstream]
+
+
+async def close_clients():
+    """Close all upstream clients"""
+    for client in clients.values():
+        await client.aclose()
+    clients.clear()
+    semaphores.clear()
+
+
+def _cache_key(method: str, url: str, params: Optional[Dict], json_body: Optional[Dict]) -> str:
+    return json.dumps([method, url, params, json_body], sort_keys=True, default=str)
+
+
+def _store(key: str, status_code: int, payload: Any, ttl: float, stale_ttl: float):
+    now = time.monotonic()
+    _cache[key] = (now + ttl, now + ttl + stale_ttl, status_code, payload)
+    _cache.move_to_end(key)
+    while len(_cache) > UPSTREAM_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+async def _request(
+    upstream: str, method: str, url: str,
+    params: Optional[Dict], json_body: Optional[Dict], headers: Optional[Dict]
+) -> Tuple[int, Any]:
+    client = get_client(upstream)
+    async with semaphores[upstream]:
+        response = await client.request(method, url, params=params, json=json_body, headers=headers)
+    # Error pages (expired-token 401s, proxy 502s) are often empty or HTML; callers
+    # report those by status code, so they get no payload rather than a decode error
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
+
+
+async def _fetch_and_store(
+    key: str, upstream: str, method: str, url: str,
+    params: Optional[Dict], json_body: Optional[Dict], headers: Optional[Dict],
+    ttl: float, stale_ttl: float
+) -> Tuple[int, Any]:
+    try:
+        status_code, payload = await _request(upstream, method, url, params, json_body, headers)
+        # Only successful JSON responses are cached
+        if status_code == 200 and payload is not None:
+            _store(key, status_code, payload, ttl, stale_ttl)
+        return status_code, payload
+    finally:
+        _inflight.pop(key, None)
+
+
+async def fetch_json(
+    upstream: str,
+    method: str,
+    url: str,
+    params: Optional[Dict] = None,
+    json_body: Optional[Dict] = None,
+    headers: Optional[Dict] = None,
+    ttl: float = UPSTREAM_CACHE_TTL,
+    stale_ttl: float = UPSTREAM_CACHE_STALE_TTL
+) -> Tuple[int, Any]:
+    """
+    Call an upstream JSON API through its pooled client and the response cache
+
+    Fresh cache entries are returned directly. Entries past their TTL but
+    within the stale window are returned immediately while one background
+    request refreshes them. Concurrent misses for the same key share a
+    single upstream request.
+
+    Args:
+        upstream: Key into config.UPSTREAMS
+        method: HTTP method
+        url: Full upstream URL
+        params: Query parameters
+        json_body: JSON request body
+        headers: Request headers (not part of the cache key)
+        ttl: Seconds a response is fresh, 0 disables caching
+        stale_ttl: Seconds after ttl a stale response may still be served
+
+    Returns:
+        Tuple of (status code, decoded JSON payload or None if the body isn't JSON)
+
+    Raises:
+        httpx.HTTPError: On connection errors or timeouts
+    """
+    key = _cache_key(method, url, params, json_body)
+    now = time.monotonic()
+
+    if ttl > 0 and key in _cache:
+        fresh_until, stale_until, status_code, payload = _cache[key]
+        if now < fresh_until:
+            _cache.move_to_end(key)
+            return status_code, payload
+        if now < stale_until:
+            _cache.move_to_end(key)
+            if key not in _inflight:
+                task = asyncio.create_task(
+                    _fetch_and_store(key, upstream, method, url, params, json_body, headers, ttl, stale_ttl)
+                )
+                _inflight[key] = task
+                _refreshes.add(task)
+                task.add_done_callback(_refresh_done)
+            return status_code, payload
+
+    if ttl <= 0:
+        return await _request(upstream, method, url, params, json_body, headers)
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _fetch_and_store(key, upstream, method, url, params, json_body, headers, ttl, stale_ttl)
+        )
+        _inflight[key] = task
+    return await asyncio.shield(task)
+
+
+def _refresh_done(task: asyncio.Task):
+    _refreshes.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f"⚠️ Warning: Background upstream refresh failed: {task.exception()}")
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Tuple, List, Optional
+
+from PIL import Image, ImageOps, features
+
+from config import (
+    BEFORE_IMAGE_DIR, AFTER_IMAGE_DIR, RENDITIONS_DIRNAME,
+    RENDITION_SIZES, RENDITION_JPEG_QUALITY,
+    VARIANTS_DIRNAME, IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY
+)
+
+# Configured variant formats this Pillow build can encode (AVIF needs Pillow 11.3+ or pillow-avif-plugin)
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+VARIANT_FORMATS = [fmt for fmt in IMAGE_VARIANT_FORMATS if fmt in IMAGE_VARIANT_QUALITY and features.check(fmt)]
+
+# Originals that get variants (GIFs may be animated and are served as uploaded)
+VARIANT_SOURCE_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+
+
+def original_path(image_type: str, filename: str) -> Path:
+    """Path of an uploaded original"""
+    return (BEFORE_IMAGE_DIR if image_type == 'before' else AFTER_IMAGE_DIR) / filename
+
+
+def rendition_path(image_type: str, filename: str, name: str) -> Path:
+    """Path of a rendition, e.g. uploads/before/renditions/report/<stem>.jpg"""
+    base_dir = BEFORE_IMAGE_DIR if image_type == 'before' else AFTER_IMAGE_DIR
+    return base_dir / RENDITIONS_DIRNAME / name / f"{Path(filename).stem}.jpg"
+
+
+def rendition_url(image_type: str, filename: str, name: str) -> str:
+    """Public URL of a rendition"""
+    return f"/uploads/{image_type}/{RENDITIONS_DIRNAME}/{name}/{Path(filename).stem}.jpg"
+
+
+def variant_path(path: Path, fmt: str) -> Path:
+    """Path of a modern-format copy of an upload or rendition, e.g. uploads/before/variants/<name>.webp"""
+    return path.parent / VARIANTS_DIRNAME / f"{path.name}.{fmt}"
+
+
+def derived_paths(image_type: str, filename: str) -> List[Path]:
+    """Every file generated from an upload: renditions and the variants of it and its renditions"""
+    sources = [original_path(image_type, filename)] + [rendition_path(image_type, filename, name) for name in RENDITION_SIZES]
+    return sources[1:] + [variant_path(path, fmt) for path in sources for fmt in VARIANT_FORMATS]
+
+
+def _temp_path(dest: Path) -> Path:
+    """
+    Private temp file for writing dest, renamed into place when complete
+
+    Unique per writer: an upload's background generation, a report and
+    other worker processes may produce the same file at the same time.
+    """
+    return dest.parent / f".{dest.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+
+def _discard(tmp_path: Path):
+    try:
+        tmp_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def create_variant(source: Path, fmt: str) -> Optional[Path]:
+    """
+    Encode source as AVIF/WebP next to it
+
+    Skipped (returns None) when the result isn't smaller than the source.
+    """
+    dest = variant_path(source, fmt)
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if img.mode in ('LA', 'P') else 'RGB')
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temp_path(dest)
+        try:
+            img.save(tmp_path, fmt.upper(), quality=IMAGE_VARIANT_QUALITY[fmt])
+        except BaseException:
+            _discard(tmp_path)
+            raise
+    if tmp_path.stat().st_size >= source.stat().st_size:
+        _discard(tmp_path)
+        return None
+    os.replace(tmp_path, dest)
+    return dest
+
+
+def ensure_variants(source: Path):
+    """Create missing variants of an upload or rendition"""
+    if source.suffix.lower() not in VARIANT_SOURCE_SUFFIXES or not source.exists():
+        return
+    for fmt in VARIANT_FORMATS:
+        dest = variant_path(source, fmt)
+        if dest.exists() and dest.stat().st_mtime >= source.stat().st_mtime:
+            continue
+        try:
+            create_variant(source, fmt)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not create {fmt} variant of {source.name}: {e}")
+
+
+def create_rendition(source: Path, dest: Path, size: int):
+    """Write a JPEG copy of source that fits in a size x size box"""
+    with Image.open(source) as img:
+        # Let the JPEG decoder downscale while decoding instead of loading full resolution
+        img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temp_path(dest)
+        try:
+            img.save(tmp_path, 'JPEG', quality=RENDITION_JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            _discard(tmp_path)
+            raise
+
+
+def ensure_rendition(image_type: str, filename: str, name: str) -> Path:
+    """
+    Return the rendition for an upload, creating it if missing
+
+    Falls back to the original when the rendition can't be produced.
+    """
+    source = original_path(image_type, filename)
+    dest = rendition_path(image_type, filename, name)
+    try:
+        if dest.exists() and dest.stat().st_mtime >= source.stat().st_mtime:
+            return dest
+        create_rendition(source, dest, RENDITION_SIZES[name])
+        return dest
+    except Exception as e:
+        print(f"⚠️ Warning: Could not create {name} rendition for {image_type}/{filename}: {e}")
+        return source
+
+
+def ensure_renditions(images: Iterable[Tuple[str, str]], name: str) -> Dict[Tuple[str, str], Path]:
+    """Ensure renditions for many (image_type, filename) pairs, returning their paths"""
+    return {key: ensure_rendition(key[0], key[1], name) for key in set(images)}
+
+
+def generate_all(image_type: str, filename: str):
+    """Create every configured rendition and variant for a new upload"""
+    ensure_variants(original_path(image_type, filename))
+    for name in RENDITION_SIZES:
+        ensure_variants(ensure_rendition(image_type, filename, name))
+
+
+async def generate_many(images: Iterable[Tuple[str, str]]):
+    """Create renditions for several (image_type, filename) uploads concurrently"""
+    await asyncio.gather(*(asyncio.to_thread(generate_all, image_type, filename) for image_type, filename in images))
+
+
+def delete_renditions(image_type: str, filename: str):
+    """Remove all renditions and variants of an upload"""
+    for path in derived_paths(image_type, filename):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Warning: Error deleting {path.name} derived from {filename}: {e}")
+
+
+def backfill():
+    """Generate missing renditions for every existing upload"""
+    count = 0
+    for image_type, directory in (('before', BEFORE_IMAGE_DIR), ('after', AFTER_IMAGE_DIR)):
+        for path in directory.iterdir():
+            if path.is_file():
+                generate_all(image_type, path.name)
+                count += 1
+    print(f"✅ Renditions and variants ensured for {count} uploads")
+
+
+if __name__ == '__main__':
+    backfill()
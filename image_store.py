@@ -0,0 +1,173 @@
+from collections import defaultdict, deque
+from typing import List, Tuple, Iterable, Dict
+
+import database
+
+IMAGE_FILE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS image_file (
+        image_type ENUM('before', 'after') NOT NULL,
+        image_path VARCHAR(255) NOT NULL,
+        sha256 CHAR(64),
+        size BIGINT,
+        ref_count INT NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (image_type, image_path)
+    )
+"""
+
+
+async def ensure_table():
+    """Create the image_file index, seeding reference counts from component_images on first run"""
+    existing = await database.fetch_all("SHOW TABLES LIKE 'image_file'")
+    await database.execute(IMAGE_FILE_TABLE_SQL)
+    if not existing:
+        await database.execute("""
+            INSERT INTO image_file (image_type, image_path, ref_count)
+            SELECT image_type, image_path, COUNT(*)
+            FROM component_images
+            WHERE image_path IS NOT NULL AND image_type IS NOT NULL
+            GROUP BY image_type, image_path
+        """)
+        print("✅ Seeded image_file reference counts from component_images")
+
+
+async def register_uploads(uploads: Iterable[dict]):
+    """
+    Record newly stored files (upload results) with no references yet
+
+    A duplicate upload refreshes last_uploaded_at, which keeps the shared
+    file out of the orphan sweep until the client has had time to attach it.
+    """
+    params = [(u["field"], u["filename"], u["sha256"], u["size"]) for u in uploads]
+    if not params:
+        return
+    try:
+        await database.execute_many(
+            """
+                INSERT INTO image_file (image_type, image_path, sha256, size, ref_count) VALUES (%s, %s, %s, %s, 0)
+                ON DUPLICATE KEY UPDATE sha256 = VALUES(sha256), size = VALUES(size), last_uploaded_at = CURRENT_TIMESTAMP
+            """,
+            params
+        )
+    except Exception as e:
+        print(f"⚠️ Warning: Could not register uploaded files: {e}")
+
+
+async def add_references(images: List[Tuple[str, str]], db=database):
+    """Count one more reference for each (image_type, image_path); duplicates count twice"""
+    if not images:
+        return
+    await db.execute_many(
+        """
+            INSERT INTO image_file (image_type, image_path, ref_count) VALUES (%s, %s, 1)
+            ON DUPLICATE KEY UPDATE ref_count = ref_count + 1
+        """,
+        images
+    )
+
+
+async def release_references(images: List[Tuple[str, str]], db=database) -> List[Tuple[str, str]]:
+    """
+    Drop one reference for each (image_type, image_path)
+
+    Pass a database.Transaction as db to release inside a write's
+    transaction, and delete the returned files only after it commits.
+
+    Returns:
+        The images whose last reference went away; their index rows are
+        removed and the caller should delete the files
+    """
+    if not images:
+        return []
+    await db.execute_many(
+        "UPDATE image_file SET ref_count = ref_count - 1 WHERE image_type = %s AND image_path = %s",
+        images
+    )
+
+    unique = list(set(images))
+    conditions = ' OR '.join(['(image_type = %s AND image_path = %s)'] * len(unique))
+    params = tuple(value for image in unique for value in image)
+    released = await db.fetch_all(
+        f"SELECT image_type, image_path FROM image_file WHERE ref_count <= 0 AND ({conditions})",
+        params
+    )
+    if not released:
+        return []
+
+    released = [(r['image_type'], r['image_path']) for r in released]
+    await db.execute_many(
+        "DELETE FROM image_file WHERE image_type = %s AND image_path = %s AND ref_count <= 0",
+        released
+    )
+    return released
+
+
+def diff_image_list(current: List[Dict], paths: List[str]) -> Tuple[List[Tuple[int, str]], List[Dict], List[Tuple[int, int]]]:
+    """
+    Compare a component's current image rows of one type with the wanted list
+
+    Rows are matched by path (repeated paths pair up in order), so
+    untouched images keep their id and created_at.
+
+    Args:
+        current: Rows with id, image_path and sort_order, in display order
+        paths: Wanted filenames in display order
+
+    Returns:
+        Tuple of (positions and paths to insert, rows to delete,
+        (sort_order, id) updates for kept rows that moved)
+    """
+    available = defaultdict(deque)
+    for row in current:
+        available[row['image_path']].append(row)
+
+    inserts = []
+    moves = []
+    for position, path in enumerate(paths):
+        if available[path]:
+            row = available[path].popleft()
+            if row['sort_order'] != position:
+                moves.append((position, row['id']))
+        else:
+            inserts.append((position, path))
+
+    deletes = [row for rows in available.values() for row in rows]
+    return inserts, deletes, moves
+
+
+async def sync_component_images(comp_id: int, image_type: str, paths: List[str], db=database) -> List[Tuple[str, str]]:
+    """
+    Make a component's images of one type equal paths, touching only changed rows
+
+    Adds references for inserted images before releasing removed ones, so
+    a file moved between positions is never deleted.
+
+    Returns:
+        Images whose last reference went away (delete the files after commit)
+    """
+    current = await db.fetch_all(
+        "SELECT id, image_path, sort_order FROM component_images WHERE comp_id = %s AND image_type = %s ORDER BY sort_order, id",
+        (comp_id, image_type)
+    )
+    inserts, deletes, moves = diff_image_list(current, paths)
+
+    if inserts:
+        await add_references([(image_type, path) for _, path in inserts], db=db)
+        await db.execute_many(
+            "INSERT INTO component_images (comp_id, image_path, image_type, sort_order) VALUES (%s, %s, %s, %s)",
+            [(comp_id, path, image_type, position) for position, path in inserts]
+        )
+    if deletes:
+        placeholders = ','.join(['%s'] * len(deletes))
+        await db.execute(
+            f"DELETE FROM component_images WHERE id IN ({placeholders})",
+            tuple(row['id'] for row in deletes)
+        )
+    if moves:
+        await db.execute_many("UPDATE component_images SET sort_order = %s WHERE id = %s", moves)
+
+    if inserts or deletes or moves:
+        print(f"🔁 Component {comp_id} {image_type} images: +{len(inserts)} -{len(deletes)} moved {len(moves)}")
+    return await release_references([(image_type, row['image_path']) for row in deletes], db=db)
+
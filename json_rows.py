@@ -0,0 +1,56 @@
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # orjson handles datetime/date natively; Decimal gets the numbers FastAPI's
+    # encoder produced before (int for whole values, float otherwise)
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes for API content (dicts/lists of DB values)"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    Returned directly from an endpoint, it also bypasses FastAPI's
+    jsonable_encoder pass and response_model validation, so use it only
+    for content built from trusted database rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def records(columns: Sequence[str], rows: Iterable[tuple], fields: Sequence[str]) -> List[dict]:
+    """
+    Dicts with `fields` built straight from cursor tuples (database.fetch_rows)
+
+    Args:
+        columns: Column names of the tuples, in cursor order
+        rows: Row tuples
+        fields: Output keys, each one of columns
+
+    Returns:
+        One dict per row, keys in `fields` order
+    """
+    fields = list(fields)
+    if fields == list(columns):
+        return [dict(zip(fields, row)) for row in rows]
+    if not fields:
+        return [{} for _ in rows]
+    if len(fields) == 1:
+        position = columns.index(fields[0])
+        return [{fields[0]: row[position]} for row in rows]
+    pick = itemgetter(*[columns.index(field) for field in fields])
+    return [dict(zip(fields, pick(row))) for row in rows]
@@ -1,24 +1,38 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import date, datetime
+from datetime import datetime
 from decimal import Decimal
-from itertools import zip_longest
-import uuid
+import json
 import os
 from pathlib import Path
-import io
-from jinja2 import Environment, FileSystemLoader
-from xhtml2pdf import pisa
-from fastapi.responses import StreamingResponse
-import requests
-from fastapi.responses import JSONResponse
+import httpx
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 import database
-from config import CORS_ORIGINS, BEFORE_IMAGE_DIR, AFTER_IMAGE_DIR, ALLOWED_EXTENSIONS, MAX_FILE_SIZE
+import report_data
+import render_worker
+import report_jobs
+import report_cache
+import report_fragments
+import file_stream
+import upload_static
+import http_cache
+import compression
+import json_rows
+import image_renditions
+import upload_stream
+import image_store
+import http_client
+from smdp_api import EXTERNAL_API_URL, HEADERS, grid_params
+import scheme_sync
+import pagination
+import scheme_search
+import stats
+import migrations
+import file_cleanup
+from config import CORS_ORIGINS, BEFORE_IMAGE_DIR, AFTER_IMAGE_DIR, MAX_FILE_SIZE, MAX_BATCH_FILES, MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,10 +48,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Brotli/gzip for JSON bodies over COMPRESS_MIN_SIZE
+app.add_middleware(compression.CompressionMiddleware)
+
 # Mount uploads directory for static file serving
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# (immutable caching, ETags, byte ranges and AVIF/WebP variants by Accept)
+app.mount("/uploads", upload_static.UploadFiles(directory="uploads"), name="uploads")
 
 
 # ============== Pydantic Models ==============
@@ -109,6 +128,23 @@ class ComponentResponse(BaseModel):
     is_active: bool = True
 
 
+class ReportJobCreate(BaseModel):
+    gs_nos: Optional[List[int]] = None
+    backend: Optional[str] = None  # 'xhtml2pdf' or 'reportlab', REPORT_BACKEND if omitted
+
+
+# Columns accepted by ?fields= and ?sort= on the list endpoints
+SCHEME_FIELDS = [
+    "gs_no", "sr_no", "name_of_scheme", "physical_progress", "total_allocation", "funds_released",
+    "committed_fund_utilization", "labour_deployed", "remarks", "created_at", "updated_at"
+]
+SCHEME_SORT_KEYS = ["gs_no", "sr_no", "name_of_scheme", "physical_progress", "total_allocation", "updated_at"]
+
+COMPONENT_IMAGE_FIELDS = {"before_images": "before", "after_images": "after"}
+COMPONENT_FIELDS = ["comp_id", "component_name", "starting_date", "created_at", "gs_no", "is_active"] + list(COMPONENT_IMAGE_FIELDS)
+COMPONENT_SORT_KEYS = ["comp_id", "component_name", "created_at", "gs_no"]
+
+
 # ============== Startup and Shutdown ==============
 
 @app.on_event("startup")
@@ -116,74 +152,86 @@ async def startup():
     """Initialize database connection pool on startup"""
     await database.create_pool()
     print("✅ Database connection pool created")
+    render_worker.start_executor()
+    print("✅ PDF render worker pool started")
     
-    # Migration: Move starting_date from scheme to component
+    # Schema migrations (just a version check once everything is applied)
     try:
-        # 1. Add column to component if it doesn't exist
-        print("🛠️ Running migration: Checking/Adding starting_date to component table...")
-        columns_comp = await database.fetch_all("SHOW COLUMNS FROM component LIKE 'starting_date'")
-        if not columns_comp:
-            await database.execute("ALTER TABLE component ADD COLUMN starting_date DATE")
-            print("✅ Added starting_date to component table")
-        
-        # 2. Migrate data from scheme to components
-        print("🛠️ Running migration: Copying dates from schemes to components...")
-        # Check if starting_date still exists in scheme to avoid error if already dropped
-        columns_scheme = await database.fetch_all("SHOW COLUMNS FROM scheme LIKE 'starting_date'")
-        if columns_scheme:
-            await database.execute("""
-                UPDATE component c
-                JOIN scheme s ON c.gs_no = s.gs_no
-                SET c.starting_date = s.starting_date
-                WHERE c.starting_date IS NULL AND s.starting_date IS NOT NULL
-            """)
-            print("✅ Data migration successful")
-            
-            # 3. Optional: Drop column from scheme
-            # await database.execute("ALTER TABLE scheme DROP COLUMN starting_date")
-            # print("✅ Dropped starting_date from scheme table")
-        else:
-            print("ℹ️ Migration already completed or starting_date column missing from scheme")
-            
+        await migrations.run()
     except Exception as e:
         print(f"⚠️ Migration Error: {e}")
-
-    # Diagnostic: Print current schemes in DB
-    try:
-        schemes = await database.fetch_all("SELECT gs_no, name_of_scheme FROM scheme")
-        print(f"🔍 Startup Diagnostic: {len(schemes)} schemes found in DB")
-        for s in schemes:
-            print(f"   - GS_NO: {s['gs_no']}, Name: {s['name_of_scheme']}")
-    except Exception as e:
-        print(f"❌ Startup Scheme Diagnostic Error: {e}")
+    scheme_search.available = migrations.is_applied(migrations.m003_search_fulltext_indexes)
+    
+    file_cleanup.start()
+    print("✅ File cleanup worker started")
 
 
 @app.on_event("shutdown")
 async def shutdown():
     """Close database connection pool on shutdown"""
+    # Drain queued file deletions while the pool is still open for reference checks
+    await file_cleanup.stop()
+    print("✅ File cleanup worker stopped")
     await database.close_pool()
     print("✅ Database connection pool closed")
+    render_worker.shutdown_executor()
+    print("✅ PDF render worker pool stopped")
+    await http_client.close_clients()
+    print("✅ Upstream HTTP clients closed")
 
 
 # ============== Helper Functions ==============
 
-def allowed_file(filename: str) -> bool:
-    """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+async def receive_single_upload(request: Request, image_type: str, destination: Path) -> str:
+    """Stream a single-file multipart upload (field 'file') to disk and return its filename"""
+    try:
+        results, _ = await upload_stream.receive_files(request, {"file": destination}, max_file_size=MAX_FILE_SIZE)
+    except upload_stream.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
+    if not results:
+        raise HTTPException(status_code=400, detail="No file provided")
 
-def save_upload_file(upload_file: UploadFile, destination: Path) -> str:
-    """Save uploaded file and return filename"""
-    # Generate unique filename
-    file_extension = upload_file.filename.rsplit('.', 1)[1].lower()
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = destination / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(upload_file.file.read())
-    
-    return unique_filename
+    result = {**results[0], "field": image_type}
+    if result["duplicate"]:
+        print(f"♻️ Reusing stored {image_type} image {result['filename']}")
+    await image_store.register_uploads([result])
+    return result["filename"]
+
+
+# OpenAPI schema for endpoints that read the multipart body themselves
+SINGLE_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+BATCH_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "before": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "after": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "comp_id": {"type": "integer", "description": "Optional component to attach the images to"}
+                    }
+                }
+            }
+        }
+    }
+}
 
 
 # ============== External API Proxy ==============
@@ -197,35 +245,15 @@ TOURISM_BEARER_TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJ1c2VySWQiOiJlYjF
 REPORTS_API_URL = "https://tourism.datsystems.co/api/reports"
 
 
-#this is SMDP API
-BEARER_TOKEN = (
-    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
-    "eyJ1bmlxdWVfbmFtZSI6InNvLmRldi50b3VyIiwi"
-    "Q2xpZW50SVAiOiIxMTYuOTAuMTI1LjEzNCIsIm5iZiI6"
-    "MTc3MDU3NDgxNSwiZXhwIjoxNzcwNjYxMjE1LCJpYXQi"
-    "OjE3NzA1NzQ4MTV9."
-    "qAMV2EeOE_Cvty9bv8zRAVrXbE2X3ZsoMgkWi2lm6Rw"
-)
-
-EXTERNAL_API_URL = (
-    "https://smdpservice.punjab.gov.pk/api/"
-    "MPRGraphDashboard/GetADPDashBoardProjectListGridData"
-)
+def invalid_upstream_response() -> JSONResponse:
+    """502 for an upstream 200 whose body isn't JSON (an HTML error or login page)"""
+    return JSONResponse(content={"error": "Invalid upstream response"}, status_code=502)
 
-# ============== COMMON HEADERS ==============
-
-HEADERS = {
-    "Authorization": f"Bearer {BEARER_TOKEN}",
-    "Accept": "application/json",
-    "User-Agent": "Mozilla/5.0",
-    "Referer": "https://smdpservice.punjab.gov.pk/",
-    "Origin": "https://smdpservice.punjab.gov.pk"
-}
 
 # ================= API =====================
 #smdp api
 @app.get("/api/get_project")
-def get_project(
+async def get_project(
     gsNo: str = Query("", description="GS Number"),
     page: int = 1,
     rows: int = 50
@@ -234,65 +262,23 @@ def get_project(
     Proxy API to Punjab SMDP service
     """
 
-    params = {
-        "financialYearId": "12",
-        "userID": "2127",
-        "sectorID": "null",
-        "subSectorID": "null",
-        "divisionID": "null",
-        "districtID": "null",
-        "constituencyID": "null",
-        "tehsilID": "null",
-        "ppID": "null",
-        "userTypeID": "3",
-        "reportTypeID": "0",
-        "reportProposedTypeID": "0",
-        "reportSubTypeID": "0",
-        "DraftStatusID": "0",
-        "departmentID": "null",
-        "schemeTypeID": "null",
-        "schemeSubTypeID": "null",
-        "percentageStart": "0",
-        "percentageEnd": "0",
-        "statusTypeID": "null",
-        "fundingCostType": "null",
-        "approvalStatus": "",
-        "isFullyFunded": "false",
-        "regionID": "null",
-        "approvalStatusCatFilterID": "null",
-        "regionIdCSV": "",
-        "ExecutingAgencyIdCSV": "",
-        "SponsorAgencyIdCSV": "",
-        "deptGroupID": "null",
-        "searchText": gsNo.strip() if gsNo else "",
-        "FilterID": "null",
-        "isOnGoing": "false",
-        "onGoingRangeCategoryID": "null",
-        "fullyFundedCategoryID": "null",
-        "IsCompleteProgress": "false",
-        "CompleteProgressRangeCategoryID": "null",
-        "_search": "false",
-        "rows": str(rows),
-        "page": str(page),
-        "sidx": "gsNo",
-        "sord": "asc",
-        "nd": "1770575180022"
-    }
+    params = grid_params(gsNo.strip() if gsNo else "", page, rows)
 
     try:
-        response = requests.get(
-            EXTERNAL_API_URL,
-            headers=HEADERS,
+        status_code, payload = await http_client.fetch_json(
+            "smdp", "GET", EXTERNAL_API_URL,
             params=params,
-            timeout=30
+            headers=HEADERS
         )
+        if status_code == 200 and payload is None:
+            return invalid_upstream_response()
 
         return JSONResponse(
-            status_code=response.status_code,
-            content=response.json()
+            status_code=status_code,
+            content=payload
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return JSONResponse(
             status_code=500,
             content={"error": str(e)}
@@ -309,10 +295,12 @@ async def get_project_structure(project_id: str):
     }
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        return JSONResponse(content={"error": "Failed to fetch structure", "status": response.status_code}, status_code=response.status_code)
+        status_code, payload = await http_client.fetch_json("tourism", "GET", url, headers=headers)
+        if status_code == 200 and payload is None:
+            return invalid_upstream_response()
+        if status_code == 200:
+            return JSONResponse(content=payload)
+        return JSONResponse(content={"error": "Failed to fetch structure", "status": status_code}, status_code=status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -328,10 +316,12 @@ async def get_project_details(project_id: str):
     }
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        return JSONResponse(content={"error": "Failed to fetch project details", "status": response.status_code}, status_code=response.status_code)
+        status_code, payload = await http_client.fetch_json("tourism", "GET", url, headers=headers)
+        if status_code == 200 and payload is None:
+            return invalid_upstream_response()
+        if status_code == 200:
+            return JSONResponse(content=payload)
+        return JSONResponse(content={"error": "Failed to fetch project details", "status": status_code}, status_code=status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -346,10 +336,12 @@ async def get_reports():
     }
 
     try:
-        response = requests.get(REPORTS_API_URL, headers=headers)
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        return JSONResponse(content={"error": "Failed to fetch reports", "status": response.status_code}, status_code=response.status_code)
+        status_code, payload = await http_client.fetch_json("tourism", "GET", REPORTS_API_URL, headers=headers)
+        if status_code == 200 and payload is None:
+            return invalid_upstream_response()
+        if status_code == 200:
+            return JSONResponse(content=payload)
+        return JSONResponse(content={"error": "Failed to fetch reports", "status": status_code}, status_code=status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -365,10 +357,12 @@ async def get_report_details(report_id: str):
     }
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        return JSONResponse(content={"error": "Failed to fetch report details", "status": response.status_code}, status_code=response.status_code)
+        status_code, payload = await http_client.fetch_json("tourism", "GET", url, headers=headers)
+        if status_code == 200 and payload is None:
+            return invalid_upstream_response()
+        if status_code == 200:
+            return JSONResponse(content=payload)
+        return JSONResponse(content={"error": "Failed to fetch report details", "status": status_code}, status_code=status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -385,6 +379,28 @@ async def root():
     }
 
 
+# ============== METRICS ==============
+
+@app.get("/metrics")
+async def get_metrics(format: str = Query("prometheus", description="'prometheus' (text) or 'json'")):
+    """Database pool, acquire wait and query latency metrics"""
+    if format == "json":
+        return database.metrics()
+    return PlainTextResponse(database.metrics_text())
+
+
+# ============== PORTFOLIO STATISTICS ==============
+
+@app.get("/api/stats")
+async def get_stats():
+    """Portfolio totals and per-progress-range breakdown, aggregated in SQL"""
+    try:
+        return await stats.get_stats()
+    except Exception as e:
+        print(f"❌ Error in get_stats: {e}")
+        raise HTTPException(status_code=500, detail=f"Error computing statistics: {str(e)}")
+
+
 # ============== SCHEME CRUD ENDPOINTS ==============
 
 @app.post("/api/scheme", response_model=dict, status_code=201)
@@ -399,55 +415,115 @@ async def create_scheme(scheme: SchemeCreate):
     """
     
     try:
-        await database.execute(
-            query,
-            (
-                scheme.gs_no, scheme.sr_no, scheme.name_of_scheme,
-                scheme.physical_progress,
-                scheme.total_allocation, scheme.funds_released,
-                scheme.committed_fund_utilization, scheme.labour_deployed,
-                scheme.remarks
+        async with database.transaction() as tx:
+            await tx.execute(
+                query,
+                (
+                    scheme.gs_no, scheme.sr_no, scheme.name_of_scheme,
+                    scheme.physical_progress,
+                    scheme.total_allocation, scheme.funds_released,
+                    scheme.committed_fund_utilization, scheme.labour_deployed,
+                    scheme.remarks
+                )
             )
-        )
+            await report_cache.bump_version(db=tx)
         return {"message": "Scheme created successfully", "gs_no": scheme.gs_no}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating scheme: {str(e)}")
 
 
-@app.get("/api/scheme")
+@app.get("/api/scheme", response_class=json_rows.ORJSONResponse)
 async def get_all_schemes(
-    name: Optional[str] = Query(None, description="Filter by scheme name (partial match)"),
-    gs_no: Optional[int] = Query(None, description="Filter by GS number (exact match)")
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="Filter by scheme name (exact match)"),
+    q: Optional[str] = Query(None, description="Search scheme name, remarks, component names or GS number"),
+    gs_no: Optional[int] = Query(None, description="Filter by GS number (exact match)"),
+    limit: Optional[int] = Query(None, ge=1, description=f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    sort: Optional[str] = Query(None, description="Sort key, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return")
 ):
-    """Get all schemes with optional filtering by name or gs_no"""
+    """
+    Get schemes with optional filtering by name or gs_no, or a search (q)
+
+    Pages are keyset-based (?limit=, DEFAULT_PAGE_SIZE when omitted): follow
+    the X-Next-Cursor response header (absent on the last page) with ?cursor=.
+    Responses carry an ETag; If-None-Match returns 304 while the data is unchanged.
+    """
+    try:
+        sort_column, descending = pagination.parse_sort(sort, SCHEME_SORT_KEYS, "gs_no")
+        columns = pagination.parse_fields(fields, SCHEME_FIELDS)
+        keyset, keyset_params = pagination.keyset_clause(sort_column, "gs_no", descending, cursor)
+    except pagination.PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Unchanged since the client's copy: skip the query and serialization
+    etag = await http_cache.list_etag("scheme", request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_etag(response, etag)
+
     # Build dynamic query based on filters
-    query = "SELECT * FROM scheme WHERE 1=1"
+    select = "*" if columns is None else ", ".join(dict.fromkeys(columns + ["gs_no", sort_column]))
+    query = f"SELECT {select} FROM scheme WHERE 1=1"
     params = []
     
     if name:
-        query += " AND name_of_scheme LIKE %s"
-        params.append(f"%{name}%")
+        query += " AND name_of_scheme = %s"
+        params.append(name)
+
+    if q:
+        condition, condition_params = scheme_search.filter_condition(q)
+        query += f" AND {condition}"
+        params.extend(condition_params)
     
     if gs_no:
         query += " AND gs_no = %s"
         params.append(gs_no)
+
+    if keyset:
+        query += f" AND {keyset}"
+        params.extend(keyset_params)
     
-    query += " ORDER BY gs_no"
+    query += " " + pagination.order_clause(sort_column, "gs_no", descending)
+
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    query += " LIMIT %s"
+    params.append(page_size + 1)
     
     try:
-        raw_schemes = await database.fetch_all(query, tuple(params) if params else None)
-        print(f"📡 API Request: /api/scheme -> Found {len(raw_schemes)} schemes in DB (filters: name={name}, gs_no={gs_no})")
+        db_columns, rows = await database.fetch_rows(query, tuple(params) if params else None)
+        rows, next_cursor = pagination.paginate(rows, db_columns.index(sort_column), db_columns.index("gs_no"), page_size)
+        print(f"📡 API Request: /api/scheme -> Found {len(rows)} schemes in DB (filters: name={name}, q={q}, gs_no={gs_no})")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
-        # Convert to list of dicts and let FastAPI handle response model conversion
-        schemes_list = [dict(s) for s in raw_schemes]
+        # Rows go straight from cursor tuples to orjson, no per-value encoder pass
+        schemes_list = json_rows.records(db_columns, rows, db_columns if columns is None else columns)
         print(f"✅ Returning {len(schemes_list)} schemes to frontend")
         
-        return schemes_list
+        return json_rows.ORJSONResponse(content=schemes_list, headers=dict(response.headers))
     except Exception as e:
         print(f"❌ Error in get_all_schemes: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching schemes: {str(e)}")
 
 
+@app.get("/api/scheme/search")
+async def search_schemes(
+    q: str = Query(..., min_length=1, description="Words to search for; each word matches as a prefix"),
+    limit: int = Query(20, ge=1, description=f"Maximum results (max {MAX_PAGE_SIZE})")
+):
+    """Ranked search over scheme names, remarks and component names"""
+    try:
+        results = await scheme_search.search(q, min(limit, MAX_PAGE_SIZE))
+        print(f"📡 API Request: /api/scheme/search?q={q} -> {len(results)} matches")
+        return [dict(r) for r in results]
+    except Exception as e:
+        print(f"❌ Error in search_schemes: {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching schemes: {str(e)}")
+
+
 @app.get("/api/scheme/{gs_no}", response_model=SchemeResponse)
 async def get_scheme(gs_no: int):
     """Get a single scheme by gs_no"""
@@ -467,13 +543,6 @@ async def get_scheme(gs_no: int):
 @app.put("/api/scheme/{gs_no}", response_model=dict)
 async def update_scheme(gs_no: int, scheme: SchemeUpdate):
     """Update a scheme"""
-    # First check if scheme exists
-    check_query = "SELECT gs_no FROM scheme WHERE gs_no = %s"
-    existing = await database.fetch_one(check_query, (gs_no,))
-    
-    if not existing:
-        raise HTTPException(status_code=404, detail=f"Scheme with gs_no {gs_no} not found")
-    
     # Build update query dynamically based on provided fields
     update_fields = []
     params = []
@@ -512,8 +581,16 @@ async def update_scheme(gs_no: int, scheme: SchemeUpdate):
     query = f"UPDATE scheme SET {', '.join(update_fields)} WHERE gs_no = %s"
     
     try:
-        await database.execute(query, tuple(params))
+        async with database.transaction() as tx:
+            # Check the scheme exists (and lock it) on the same connection as the update
+            existing = await tx.fetch_one("SELECT gs_no FROM scheme WHERE gs_no = %s FOR UPDATE", (gs_no,))
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Scheme with gs_no {gs_no} not found")
+            await tx.execute(query, tuple(params))
+            await report_cache.bump_version(db=tx)
         return {"message": "Scheme updated successfully", "gs_no": gs_no}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error updating scheme: {str(e)}")
 
@@ -522,69 +599,69 @@ async def update_scheme(gs_no: int, scheme: SchemeUpdate):
 async def delete_scheme(gs_no: int):
     """Delete a scheme and all its associated components and images"""
     print(f"🗑️ Attempting to delete scheme: {gs_no}")
-    # Check if scheme exists
-    check_query = "SELECT * FROM scheme WHERE gs_no = %s"
-    existing = await database.fetch_one(check_query, (gs_no,))
-    
-    if not existing:
-        print(f"❌ Scheme {gs_no} not found for deletion")
-        raise HTTPException(status_code=404, detail=f"Scheme with gs_no {gs_no} not found")
-    
-    # 1. Fetch all components associated with this scheme
-    components = await database.fetch_all("SELECT comp_id FROM component WHERE gs_no = %s", (gs_no,))
-    
-    if components:
-        print(f"📦 Found {len(components)} component(s) to delete for scheme {gs_no}")
-        comp_ids = [c['comp_id'] for c in components]
-        
-        # 2. For each component, fetch and delete image files
-        for comp_id in comp_ids:
-            # Fetch image paths
-            img_query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s"
-            images = await database.fetch_all(img_query, (comp_id,))
+    try:
+        async with database.transaction() as tx:
+            # Check if scheme exists
+            existing = await tx.fetch_one("SELECT gs_no FROM scheme WHERE gs_no = %s FOR UPDATE", (gs_no,))
+            if not existing:
+                print(f"❌ Scheme {gs_no} not found for deletion")
+                raise HTTPException(status_code=404, detail=f"Scheme with gs_no {gs_no} not found")
             
-            for img in images:
-                try:
-                    if img['image_type'] == 'before':
-                        path = BEFORE_IMAGE_DIR / img['image_path']
-                    else:
-                        path = AFTER_IMAGE_DIR / img['image_path']
-                    
-                    if path.exists():
-                        path.unlink()
-                        print(f"   - Deleted {img['image_type']} image file: {img['image_path']}")
-                except Exception as img_e:
-                    print(f"⚠️ Warning: Error deleting image file {img['image_path']}: {img_e}")
+            # 1. Collect every image reference of the scheme's components in one query
+            scheme_images = await tx.fetch_all("""
+                SELECT ci.image_type, ci.image_path
+                FROM component_images ci
+                JOIN component c ON c.comp_id = ci.comp_id
+                WHERE c.gs_no = %s
+            """, (gs_no,))
+            
+            # 2. Delete the components in one statement (component_images rows go via ON DELETE CASCADE)
+            print(f"🧹 Deleting components of scheme {gs_no} ({len(scheme_images)} image row(s))")
+            await tx.execute("DELETE FROM component WHERE gs_no = %s", (gs_no,))
+            
+            # 3. Release image references; files go once the transaction commits
+            released = await image_store.release_references(
+                [(img['image_type'], img['image_path']) for img in scheme_images], db=tx
+            )
+            
+            # 4. Finally delete the scheme
+            await tx.execute("DELETE FROM scheme WHERE gs_no = %s", (gs_no,))
+            await report_cache.bump_version(db=tx)
         
-        # 3. Delete components (component_images will be deleted via DB CASCADE if configured)
-        print(f"🧹 Deleting {len(components)} components from database")
-        format_strings = ','.join(['%s'] * len(comp_ids))
-        await database.execute(f"DELETE FROM component WHERE comp_id IN ({format_strings})", tuple(comp_ids))
-    
-    # 4. Finally delete the scheme
-    query = "DELETE FROM scheme WHERE gs_no = %s"
-    
-    try:
-        await database.execute(query, (gs_no,))
+        # Files no other component still references are removed in the background
+        file_cleanup.enqueue(released)
         print(f"✅ Scheme {gs_no} and all associated data successfully deleted")
         return {"message": "Scheme and all associated data deleted successfully", "gs_no": gs_no}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error deleting scheme {gs_no} from DB: {e}")
         raise HTTPException(status_code=400, detail=f"Error deleting scheme: {str(e)}")
 
 
+@app.post("/api/sync/schemes", response_model=dict, status_code=202)
+async def start_scheme_sync():
+    """Start a bulk import of schemes from the SMDP project grid"""
+    started = scheme_sync.start_sync()
+    if started:
+        print("🔄 SMDP scheme sync started")
+    return {
+        "message": "Scheme sync started" if started else "Scheme sync already running",
+        "status": scheme_sync.status
+    }
+
+
+@app.get("/api/sync/schemes", response_model=dict)
+async def get_scheme_sync_status():
+    """Progress and metrics of the current or last SMDP scheme sync"""
+    return scheme_sync.status
+
+
 # ============== COMPONENT CRUD ENDPOINTS ==============
 
 @app.post("/api/component", response_model=dict, status_code=201)
 async def create_component(component: ComponentCreate):
     """Create a new component with multiple images"""
-    # Check if gs_no exists if provided
-    if component.gs_no:
-        check_query = "SELECT gs_no FROM scheme WHERE gs_no = %s"
-        scheme_exists = await database.fetch_one(check_query, (component.gs_no,))
-        if not scheme_exists:
-            raise HTTPException(status_code=404, detail=f"Scheme with gs_no {component.gs_no} not found")
-    
     # Insert component - handle both cases: provided comp_id or auto-incremented
     if component.comp_id:
         query = """
@@ -602,66 +679,127 @@ async def create_component(component: ComponentCreate):
         params = (component.component_name, component.starting_date, component.gs_no, component.is_active)
     
     try:
-        # execute() returns lastrowid for INSERTs
-        comp_id = await database.execute(query, params)
-        
-        # Use provided comp_id if available, otherwise use lastrowid
-        actual_comp_id = component.comp_id if component.comp_id else comp_id
-        
-        # Insert before images
-        if component.before_images:
-            img_query = "INSERT INTO component_images (comp_id, image_path, image_type) VALUES (%s, %s, 'before')"
-            img_params = [(actual_comp_id, img) for img in component.before_images]
-            await database.execute_many(img_query, img_params)
+        async with database.transaction() as tx:
+            # Check if gs_no exists if provided
+            if component.gs_no:
+                check_query = "SELECT gs_no FROM scheme WHERE gs_no = %s"
+                scheme_exists = await tx.fetch_one(check_query, (component.gs_no,))
+                if not scheme_exists:
+                    raise HTTPException(status_code=404, detail=f"Scheme with gs_no {component.gs_no} not found")
             
-        # Insert after images
-        if component.after_images:
-            img_query = "INSERT INTO component_images (comp_id, image_path, image_type) VALUES (%s, %s, 'after')"
-            img_params = [(actual_comp_id, img) for img in component.after_images]
-            await database.execute_many(img_query, img_params)
+            # execute() returns lastrowid for INSERTs
+            comp_id = await tx.execute(query, params)
             
+            # Use provided comp_id if available, otherwise use lastrowid
+            actual_comp_id = component.comp_id if component.comp_id else comp_id
+            
+            # Insert before and after images in one statement, keeping list order
+            img_params = [(actual_comp_id, img, 'before', i) for i, img in enumerate(component.before_images or [])]
+            img_params += [(actual_comp_id, img, 'after', i) for i, img in enumerate(component.after_images or [])]
+            if img_params:
+                img_query = "INSERT INTO component_images (comp_id, image_path, image_type, sort_order) VALUES (%s, %s, %s, %s)"
+                await tx.execute_many(img_query, img_params)
+                await image_store.add_references([(image_type, img) for _, img, image_type, _ in img_params], db=tx)
+            
+            await report_cache.bump_version(db=tx)
         return {"message": "Component created successfully", "comp_id": actual_comp_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating component: {str(e)}")
 
 
-@app.get("/api/component", response_model=List[ComponentResponse])
-async def get_all_components(gs_no: Optional[int] = Query(None, description="Filter by scheme gs_no")):
-    """Get all components with their images, optionally filtered by gs_no"""
+@app.get(
+    "/api/component",
+    response_class=json_rows.ORJSONResponse,
+    responses={200: {
+        "model": List[ComponentResponse],
+        "description": "Components; with ?fields= each object holds only the requested fields",
+    }},
+)
+async def get_all_components(
+    request: Request,
+    response: Response,
+    gs_no: Optional[int] = Query(None, description="Filter by scheme gs_no"),
+    limit: Optional[int] = Query(None, ge=1, description=f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    sort: Optional[str] = Query(None, description="Sort key, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
+    """
+    Get components with their images, optionally filtered by gs_no
+
+    Paginated and conditional (ETag/304) the same way as /api/scheme. Images
+    are only loaded when before_images/after_images are among the requested fields.
+    """
+    try:
+        sort_column, descending = pagination.parse_sort(sort, COMPONENT_SORT_KEYS, "comp_id")
+        requested = pagination.parse_fields(fields, COMPONENT_FIELDS)
+        keyset, keyset_params = pagination.keyset_clause(sort_column, "comp_id", descending, cursor)
+    except pagination.PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = await http_cache.list_etag("component", request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_etag(response, etag)
+
+    # Default output is ComponentResponse's fields
+    output_fields = COMPONENT_FIELDS if requested is None else requested
+    row_fields = [f for f in output_fields if f not in COMPONENT_IMAGE_FIELDS]
+    image_fields = [f for f in output_fields if f in COMPONENT_IMAGE_FIELDS]
+    select = ", ".join(dict.fromkeys(row_fields + ["comp_id", sort_column]))
+
+    query = f"SELECT {select} FROM component WHERE 1=1"
+    params = []
     if gs_no is not None:
-        query = "SELECT * FROM component WHERE gs_no = %s ORDER BY comp_id"
-        params = (gs_no,)
-    else:
-        query = "SELECT * FROM component ORDER BY comp_id"
-        params = None
+        query += " AND gs_no = %s"
+        params.append(gs_no)
+    if keyset:
+        query += f" AND {keyset}"
+        params.extend(keyset_params)
+    query += " " + pagination.order_clause(sort_column, "comp_id", descending)
+
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    query += " LIMIT %s"
+    params.append(page_size + 1)
     
     try:
         print(f"📡 API Request: /api/component?gs_no={gs_no}")
-        components = await database.fetch_all(query, params)
-        print(f"📊 Found {len(components)} components in DB")
-        
+        db_columns, rows = await database.fetch_rows(query, tuple(params) if params else None)
+        rows, next_cursor = pagination.paginate(rows, db_columns.index(sort_column), db_columns.index("comp_id"), page_size)
+        print(f"📊 Found {len(rows)} components in DB")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+        components = json_rows.records(db_columns, rows, row_fields)
+        for component in components:
+            # Same values ComponentResponse validation produced: string dates, boolean is_active
+            if component.get('starting_date') is not None and not isinstance(component['starting_date'], str):
+                component['starting_date'] = str(component['starting_date'])
+            if component.get('is_active') is not None:
+                component['is_active'] = bool(component['is_active'])
+
         # Fetch images for all these components
-        if components:
-            comp_ids = [c['comp_id'] for c in components]
-            print(f"🔗 Fetching images for component IDs: {comp_ids}")
+        if rows and image_fields:
+            comp_id_index = db_columns.index("comp_id")
+            comp_ids = [row[comp_id_index] for row in rows]
+            print(f"🔗 Fetching images for {len(comp_ids)} components")
             format_strings = ','.join(['%s'] * len(comp_ids))
-            img_query = f"SELECT comp_id, image_path, image_type FROM component_images WHERE comp_id IN ({format_strings})"
+            img_query = f"SELECT comp_id, image_path, image_type FROM component_images WHERE comp_id IN ({format_strings}) ORDER BY sort_order, id"
             images = await database.fetch_all(img_query, tuple(comp_ids))
             print(f"🖼️ Found {len(images)} images total")
             
             # Map images to components
-            for component in components:
-                # Convert date to string if it's a date object to avoid Pydantic validation issues
-                if 'starting_date' in component and component['starting_date'] and not isinstance(component['starting_date'], str):
-                    component['starting_date'] = str(component['starting_date'])
-                
-                component['before_images'] = [img['image_path'] for img in images 
-                                             if img['comp_id'] == component['comp_id'] and img['image_type'] == 'before']
-                component['after_images'] = [img['image_path'] for img in images 
-                                            if img['comp_id'] == component['comp_id'] and img['image_type'] == 'after']
-        
+            images_by_comp = report_data.group_images(images)
+            for comp_id, component in zip(comp_ids, components):
+                paths = report_data.image_paths(images_by_comp.get(comp_id, report_data.EMPTY_IMAGES))
+                for field in image_fields:
+                    component[field] = paths[field]
+
         print(f"✅ Successfully processed components, returning to frontend")
-        return components
+        # Trusted DB rows: skip response_model validation and the jsonable_encoder pass
+        return json_rows.ORJSONResponse(content=components, headers=dict(response.headers))
     except Exception as e:
         print(f"❌ Error in get_all_components: {e}")
         import traceback
@@ -680,11 +818,10 @@ async def get_component(comp_id: int):
             raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
             
         # Fetch images
-        img_query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s"
+        img_query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s ORDER BY sort_order, id"
         images = await database.fetch_all(img_query, (comp_id,))
         
-        component['before_images'] = [img['image_path'] for img in images if img['image_type'] == 'before']
-        component['after_images'] = [img['image_path'] for img in images if img['image_type'] == 'after']
+        component.update(report_data.image_paths(report_data.split_images(images)))
         
         return component
     except HTTPException:
@@ -696,20 +833,6 @@ async def get_component(comp_id: int):
 @app.put("/api/component/{comp_id}", response_model=dict)
 async def update_component(comp_id: int, component: ComponentUpdate):
     """Update a component including its images"""
-    # Check if component exists
-    check_query = "SELECT comp_id FROM component WHERE comp_id = %s"
-    existing = await database.fetch_one(check_query, (comp_id,))
-    
-    if not existing:
-        raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
-    
-    # Check if gs_no exists if provided
-    if component.gs_no:
-        scheme_check = "SELECT gs_no FROM scheme WHERE gs_no = %s"
-        scheme_exists = await database.fetch_one(scheme_check, (component.gs_no,))
-        if not scheme_exists:
-            raise HTTPException(status_code=404, detail=f"Scheme with gs_no {component.gs_no} not found")
-    
     # Build update query for component table
     update_fields = []
     params = []
@@ -727,61 +850,45 @@ async def update_component(comp_id: int, component: ComponentUpdate):
         update_fields.append("is_active = %s")
         params.append(component.is_active)
     
+    # Image lists to replace, if provided
+    replaced = {
+        image_type: images
+        for image_type, images in (('before', component.before_images), ('after', component.after_images))
+        if images is not None
+    }
+    
     try:
-        if update_fields:
-            params.append(comp_id)
-            query = f"UPDATE component SET {', '.join(update_fields)} WHERE comp_id = %s"
-            await database.execute(query, tuple(params))
-        
-        # Handle before images update (replace if provided)
-        if component.before_images is not None:
-            # 1. Fetch old images for file cleanup
-            old_imgs = await database.fetch_all("SELECT image_path FROM component_images WHERE comp_id = %s AND image_type = 'before'", (comp_id,))
-            old_paths = {img['image_path'] for img in old_imgs}
-            new_paths = set(component.before_images)
+        async with database.transaction() as tx:
+            # Check if component exists
+            check_query = "SELECT comp_id FROM component WHERE comp_id = %s FOR UPDATE"
+            existing = await tx.fetch_one(check_query, (comp_id,))
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
             
-            # Delete physical files that are NOT in the new list
-            for img_path in old_paths - new_paths:
-                try:
-                    path = BEFORE_IMAGE_DIR / img_path
-                    if path.exists():
-                        path.unlink()
-                        print(f"🗑️ Cleaned up old before image: {img_path}")
-                except Exception as e:
-                    print(f"⚠️ Warning: Error deleting old before image {img_path}: {e}")
-
-            # 2. Update DB records
-            await database.execute("DELETE FROM component_images WHERE comp_id = %s AND image_type = 'before'", (comp_id,))
-            if component.before_images:
-                img_query = "INSERT INTO component_images (comp_id, image_path, image_type) VALUES (%s, %s, 'before')"
-                img_params = [(comp_id, img) for img in component.before_images]
-                await database.execute_many(img_query, img_params)
-                
-        # Handle after images update (replace if provided)
-        if component.after_images is not None:
-            # 1. Fetch old images for file cleanup
-            old_imgs = await database.fetch_all("SELECT image_path FROM component_images WHERE comp_id = %s AND image_type = 'after'", (comp_id,))
-            old_paths = {img['image_path'] for img in old_imgs}
-            new_paths = set(component.after_images)
+            # Check if gs_no exists if provided
+            if component.gs_no:
+                scheme_check = "SELECT gs_no FROM scheme WHERE gs_no = %s"
+                scheme_exists = await tx.fetch_one(scheme_check, (component.gs_no,))
+                if not scheme_exists:
+                    raise HTTPException(status_code=404, detail=f"Scheme with gs_no {component.gs_no} not found")
             
-            # Delete physical files that are NOT in the new list
-            for img_path in old_paths - new_paths:
-                try:
-                    path = AFTER_IMAGE_DIR / img_path
-                    if path.exists():
-                        path.unlink()
-                        print(f"🗑️ Cleaned up old after image: {img_path}")
-                except Exception as e:
-                    print(f"⚠️ Warning: Error deleting old after image {img_path}: {e}")
-
-            # 2. Update DB records
-            await database.execute("DELETE FROM component_images WHERE comp_id = %s AND image_type = 'after'", (comp_id,))
-            if component.after_images:
-                img_query = "INSERT INTO component_images (comp_id, image_path, image_type) VALUES (%s, %s, 'after')"
-                img_params = [(comp_id, img) for img in component.after_images]
-                await database.execute_many(img_query, img_params)
+            if update_fields:
+                params.append(comp_id)
+                query = f"UPDATE component SET {', '.join(update_fields)} WHERE comp_id = %s"
+                await tx.execute(query, tuple(params))
+            
+            # Apply only the added, removed and reordered images of each replaced list
+            released = []
+            for image_type, images in replaced.items():
+                released += await image_store.sync_component_images(comp_id, image_type, images, db=tx)
+            
+            await report_cache.bump_version(db=tx)
         
+        # Physical files no longer referenced anywhere go to the cleanup worker, once committed
+        file_cleanup.enqueue(released)
         return {"message": "Component updated successfully", "comp_id": comp_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error updating component: {str(e)}")
 
@@ -790,38 +897,30 @@ async def update_component(comp_id: int, component: ComponentUpdate):
 async def delete_component(comp_id: int):
     """Delete a component and all its associated images"""
     print(f"🗑️ Attempting to delete component: {comp_id}")
-    # Check if component exists
-    check_query = "SELECT * FROM component WHERE comp_id = %s"
-    existing = await database.fetch_one(check_query, (comp_id,))
-    
-    if not existing:
-        print(f"❌ Component {comp_id} not found for deletion")
-        raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
-    
-    # Fetch all associated images for file deletion
-    img_query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s"
-    images = await database.fetch_all(img_query, (comp_id,))
-    
-    # Delete associated image files
-    for img in images:
-        try:
-            if img['image_type'] == 'before':
-                path = BEFORE_IMAGE_DIR / img['image_path']
-            else:
-                path = AFTER_IMAGE_DIR / img['image_path']
-            
-            if path.exists():
-                path.unlink()
-                print(f"   - Deleted {img['image_type']} image: {img['image_path']}")
-        except Exception as img_e:
-            print(f"⚠️ Warning: Error deleting image file {img['image_path']}: {img_e}")
-    
-    query = "DELETE FROM component WHERE comp_id = %s"
-    
     try:
-        await database.execute(query, (comp_id,))
+        async with database.transaction() as tx:
+            # Check if component exists
+            existing = await tx.fetch_one("SELECT comp_id FROM component WHERE comp_id = %s FOR UPDATE", (comp_id,))
+            if not existing:
+                print(f"❌ Component {comp_id} not found for deletion")
+                raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
+            
+            # Fetch all associated images for reference release
+            img_query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s"
+            images = await tx.fetch_all(img_query, (comp_id,))
+            
+            await tx.execute("DELETE FROM component WHERE comp_id = %s", (comp_id,))
+            released = await image_store.release_references(
+                [(img['image_type'], img['image_path']) for img in images], db=tx
+            )
+            await report_cache.bump_version(db=tx)
+        
+        # Files no other component still references are removed in the background
+        file_cleanup.enqueue(released)
         print(f"✅ Component {comp_id} and its images successfully deleted")
         return {"message": "Component and its images deleted successfully", "comp_id": comp_id}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error deleting component {comp_id} from DB: {e}")
         raise HTTPException(status_code=400, detail=f"Error deleting component: {str(e)}")
@@ -830,168 +929,255 @@ async def delete_component(comp_id: int):
 # ============== PDF REPORT GENERATION ==============
 
 @app.get("/api/reports/all/pdf")
-async def generate_pdf_report():
+async def generate_pdf_report(backend: Optional[str] = Query(None, description="Report backend: xhtml2pdf or reportlab")):
     """Generate a comprehensive PDF report of all schemes and components"""
     try:
-        # Fetch all schemes
-        schemes = await database.fetch_all("SELECT * FROM scheme ORDER BY gs_no")
-        
-        # Prepare data for template
-        for scheme in schemes:
-            # Fetch components for each scheme
-            comps = await database.fetch_all("SELECT * FROM component WHERE gs_no = %s ORDER BY comp_id", (scheme['gs_no'],))
-            
-            for comp in comps:
-                # Fetch images for each component
-                images = await database.fetch_all(
-                    "SELECT image_path, image_type FROM component_images WHERE comp_id = %s", 
-                    (comp['comp_id'],)
-                )
-                
-                # Filter before and after images and add full local paths for xhtml2pdf
-                before_list = []
-                after_list = []
-                
-                # Only process images if the component is active
-                if comp.get('is_active', True):
-                    for img in images:
-                        img_data = {"path": img['image_path'], "full_path": str((BEFORE_IMAGE_DIR if img['image_type'] == 'before' else AFTER_IMAGE_DIR) / img['image_path'])}
-                        if img['image_type'] == 'before':
-                            before_list.append(img_data)
-                        else:
-                            after_list.append(img_data)
-                
-                # Pair them up for the template (one pair per page)
-                comp['image_pairs'] = list(zip_longest(before_list, after_list, fillvalue=None))
-            
-            scheme['components'] = comps
-
-        # Render HTML template
-        env = Environment(loader=FileSystemLoader("templates"))
-        template = env.get_template("report.html")
-        html_content = template.render(
-            schemes=schemes, 
-            today=date.today().strftime("%d-%m-%Y"),
-            cover_image_path=str(Path("assets/report_cover.png").absolute())
-        )
-
-        # Create PDF
-        pdf_buffer = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.StringIO(html_content), dest=pdf_buffer)
-
-        if pisa_status.err:
-            raise HTTPException(status_code=500, detail="Error generating PDF")
+        backend = render_worker.resolve_backend(backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        pdf_buffer.seek(0)
-        
-        filename = f"Priority_Projects_Report_{date.today().strftime('%d_%m_%Y')}.pdf"
-        
-        return StreamingResponse(
-            pdf_buffer, 
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+    try:
+        filename = report_data.report_filename()
+
+        # Serve the stored PDF if nothing that goes into the report has changed
+        fingerprint = await report_cache.compute_fingerprint(backend=backend)
+        cached_path = await report_cache.get_async(fingerprint)
+        if cached_path:
+            try:
+                response = await file_stream.stream_file(cached_path, "application/pdf", filename)
+                print(f"⚡ Serving cached report {fingerprint[:12]}")
+                return response
+            except FileNotFoundError:
+                pass  # evicted since the lookup; render it again
+
+        # Fetch schemes, components and images in a fixed number of queries
+        schemes = await report_data.load_report_data()
+
+        # Render changed per-scheme fragments in the worker pool and merge them into the
+        # report cache on disk; the response streams the file in fixed-size chunks
+        path = report_cache.path_for(fingerprint)
+        await report_fragments.render_report(schemes, path, backend)
+        response = await file_stream.stream_file(path, "application/pdf", filename)
+        await report_cache.evict_async()
+        return response
         
+    except render_worker.RenderTimeoutError as e:
+        print(f"❌ PDF Generation Timeout: {e}")
+        raise HTTPException(status_code=504, detail=f"PDF report generation timed out: {str(e)}")
     except Exception as e:
         print(f"❌ PDF Generation Error: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating PDF report: {str(e)}")
 
 
+def job_response(job: dict) -> dict:
+    """Serialize a report job row for the API"""
+    job = dict(job)
+    job['params'] = json.loads(job['params']) if job.get('params') else None
+    job.pop('active_key', None)
+    job['download_url'] = f"/api/reports/jobs/{job['job_id']}/download" if job['status'] == 'completed' else None
+    return job
+
+
+@app.post("/api/reports/jobs", response_model=dict, status_code=202)
+async def create_report_job(request: ReportJobCreate):
+    """Enqueue a PDF report, reusing an identical job that is already running"""
+    try:
+        backend = render_worker.resolve_backend(request.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        job, created = await report_jobs.create_job(request.gs_nos, backend)
+        print(f"📄 Report job {job['job_id']} {'queued' if created else 'already in progress'}")
+        return {**job_response(job), "created": created}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating report job: {str(e)}")
+
+
+@app.get("/api/reports/jobs/{job_id}", response_model=dict)
+async def get_report_job(job_id: str):
+    """Get status and progress of a report job"""
+    try:
+        job = await report_jobs.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching report job: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Report job {job_id} not found")
+    return job_response(job)
+
+
+@app.get("/api/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    """Download the PDF produced by a completed report job"""
+    try:
+        job = await report_jobs.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching report job: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Report job {job_id} not found")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Report job {job_id} is {job['status']}")
+
+    path = report_jobs.job_file_path(job)
+    if not path:
+        raise HTTPException(status_code=410, detail=f"Report file for job {job_id} is no longer available")
+
+    return await file_stream.stream_file(path, "application/pdf", report_data.report_filename())
+
+
 # ============== IMAGE UPLOAD ENDPOINTS ==============
 
-@app.post("/api/upload/before", response_model=dict)
-async def upload_before_image(file: UploadFile = File(...)):
-    """Upload a before image"""
-    # Validate file
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    if not allowed_file(file.filename):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
-    
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024*1024)}MB"
-        )
-    
+@app.post("/api/upload/before", response_model=dict, openapi_extra=SINGLE_UPLOAD_OPENAPI)
+async def upload_before_image(request: Request, background_tasks: BackgroundTasks):
+    """Upload a before image (streamed to disk, rejected as soon as it exceeds the size limit)"""
     try:
-        # Save file
-        filename = save_upload_file(file, BEFORE_IMAGE_DIR)
+        filename = await receive_single_upload(request, "before", BEFORE_IMAGE_DIR)
         file_url = f"/uploads/before/{filename}"
+        # Report/thumbnail renditions are produced after the response is sent
+        background_tasks.add_task(image_renditions.generate_all, 'before', filename)
         
         return {
             "message": "Before image uploaded successfully",
             "filename": filename,
             "url": file_url
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
 
-@app.post("/api/upload/after", response_model=dict)
-async def upload_after_image(file: UploadFile = File(...)):
-    """Upload an after image"""
-    # Validate file
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    if not allowed_file(file.filename):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024*1024)}MB"
-        )
-    
+@app.post("/api/upload/after", response_model=dict, openapi_extra=SINGLE_UPLOAD_OPENAPI)
+async def upload_after_image(request: Request, background_tasks: BackgroundTasks):
+    """Upload an after image (streamed to disk, rejected as soon as it exceeds the size limit)"""
     try:
-        # Save file
-        filename = save_upload_file(file, AFTER_IMAGE_DIR)
+        filename = await receive_single_upload(request, "after", AFTER_IMAGE_DIR)
         file_url = f"/uploads/after/{filename}"
+        # Report/thumbnail renditions are produced after the response is sent
+        background_tasks.add_task(image_renditions.generate_all, 'after', filename)
         
         return {
             "message": "After image uploaded successfully",
             "filename": filename,
             "url": file_url
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
 
+@app.post("/api/upload/batch", response_model=dict, openapi_extra=BATCH_UPLOAD_OPENAPI)
+async def upload_image_batch(request: Request, background_tasks: BackgroundTasks):
+    """
+    Upload many before/after images in one multipart request
+
+    Files go in repeated 'before' and 'after' fields. Each file gets its own
+    result; rejected files don't fail the others. If a 'comp_id' field is
+    given, the saved images are attached to that component.
+    """
+    try:
+        results, fields = await upload_stream.receive_files(
+            request,
+            {"before": BEFORE_IMAGE_DIR, "after": AFTER_IMAGE_DIR},
+            max_file_size=MAX_FILE_SIZE,
+            max_files=MAX_BATCH_FILES,
+            abort_on_error=False
+        )
+    except upload_stream.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    saved = [r for r in results if "error" not in r]
+    print(f"📤 Batch upload: {len(saved)}/{len(results)} files saved")
+
+    comp_id = None
+    if fields.get("comp_id"):
+        try:
+            comp_id = int(fields["comp_id"])
+            async with database.transaction() as tx:
+                existing = await tx.fetch_one("SELECT comp_id FROM component WHERE comp_id = %s", (comp_id,))
+                if not existing:
+                    raise HTTPException(status_code=404, detail=f"Component with comp_id {comp_id} not found")
+
+                if saved:
+                    # Append after the component's existing images of each type
+                    last = await tx.fetch_all(
+                        "SELECT image_type, MAX(sort_order) AS sort_order FROM component_images WHERE comp_id = %s GROUP BY image_type",
+                        (comp_id,)
+                    )
+                    next_order = {row["image_type"]: row["sort_order"] + 1 for row in last}
+                    img_params = []
+                    for r in saved:
+                        position = next_order.get(r["field"], 0)
+                        next_order[r["field"]] = position + 1
+                        img_params.append((comp_id, r["filename"], r["field"], position))
+                    img_query = "INSERT INTO component_images (comp_id, image_path, image_type, sort_order) VALUES (%s, %s, %s, %s)"
+                    await tx.execute_many(img_query, img_params)
+                    await image_store.add_references([(r["field"], r["filename"]) for r in saved], db=tx)
+                    await report_cache.bump_version(db=tx)
+        except Exception as e:
+            # Don't leave newly stored files behind that nothing references
+            for r in saved:
+                if r["duplicate"]:
+                    continue
+                try:
+                    r["path"].unlink()
+                except FileNotFoundError:
+                    pass
+            if isinstance(e, HTTPException):
+                raise
+            if isinstance(e, ValueError):
+                raise HTTPException(status_code=400, detail="comp_id must be an integer")
+            raise HTTPException(status_code=400, detail=f"Error attaching images to component: {str(e)}")
+
+    await image_store.register_uploads(saved)
+
+    # Report/thumbnail renditions are produced after the response is sent
+    background_tasks.add_task(image_renditions.generate_many, [(r["field"], r["filename"]) for r in saved])
+
+    files = []
+    for r in results:
+        entry = {"image_type": r["field"], "original_filename": r["original_filename"], "size": r["size"]}
+        if "error" in r:
+            entry["error"] = r["error"]
+        else:
+            entry["filename"] = r["filename"]
+            entry["url"] = f"/uploads/{r['field']}/{r['filename']}"
+            entry["duplicate"] = r["duplicate"]
+        files.append(entry)
+
+    return {
+        "message": f"{len(saved)} of {len(results)} images uploaded successfully",
+        "comp_id": comp_id,
+        "attached": comp_id is not None and bool(saved),
+        "files": files
+    }
+
+
 # ============== Image URL Helper Endpoint ==============
 
 @app.get("/api/component/{comp_id}/images")
 async def get_component_images(comp_id: int):
     """Get full URLs for all component images"""
-    query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s"
+    query = "SELECT image_path, image_type FROM component_images WHERE comp_id = %s ORDER BY sort_order, id"
     
     try:
         images = await database.fetch_all(query, (comp_id,))
         
-        before_urls = [f"/uploads/before/{img['image_path']}" for img in images if img['image_type'] == 'before']
-        after_urls = [f"/uploads/after/{img['image_path']}" for img in images if img['image_type'] == 'after']
+        split = report_data.split_images(images)
+        
+        before_urls = [f"/uploads/before/{img['image_path']}" for img in split['before']]
+        after_urls = [f"/uploads/after/{img['image_path']}" for img in split['after']]
+        
+        before_thumbs = [image_renditions.rendition_url('before', img['image_path'], 'thumb') for img in split['before']]
+        after_thumbs = [image_renditions.rendition_url('after', img['image_path'], 'thumb') for img in split['after']]
         
         return {
             "comp_id": comp_id,
             "before_image_urls": before_urls,
-            "after_image_urls": after_urls
+            "after_image_urls": after_urls,
+            "before_thumbnail_urls": before_thumbs,
+            "after_thumbnail_urls": after_thumbs
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching component images: {str(e)}")
@@ -1005,7 +1191,7 @@ BEARER_TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJ1bmlxdWVfbmFtZSI6InNvLmR
 API_URL = "https://smdpservice.punjab.gov.pk/api/CFYReviewDashboard/GetCFYReviewDashboardListSection"
 
 @app.get("/get_project")
-def get_project(gsNo: str = Query("", description="GS Number to search"), filterID: str = Query("1", description="Filter ID")):
+async def get_project(gsNo: str = Query("", description="GS Number to search"), filterID: str = Query("1", description="Filter ID")):
     """
     Fetch project info dynamically by gsNo and FilterID
     """
@@ -1050,14 +1236,16 @@ def get_project(gsNo: str = Query("", description="GS Number to search"), filter
         "Authorization": f"Bearer {BEARER_TOKEN}"
     }
 
-    response = requests.post(API_URL, json=payload, headers=headers)
+    status_code, data = await http_client.fetch_json("smdp", "POST", API_URL, json_body=payload, headers=headers)
 
-    if response.status_code == 200:
-        return JSONResponse(content=response.json())
+    if status_code == 200 and data is None:
+        return invalid_upstream_response()
+    if status_code == 200:
+        return JSONResponse(content=data)
     else:
         return JSONResponse(
-            content={"error": "Failed to fetch data", "status_code": response.status_code},
-            status_code=response.status_code
+            content={"error": "Failed to fetch data", "status_code": status_code},
+            status_code=status_code
         )
 
 
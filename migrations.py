@@ -0,0 +1,185 @@
+import asyncio
+import sys
+from typing import List, Tuple, Callable, Awaitable, Set
+
+import database
+import image_store
+import report_cache
+import report_jobs
+import scheme_search
+
+SCHEMA_MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Named MySQL lock so only one of several starting workers applies migrations
+LOCK_NAME = "report_api_schema_migrations"
+LOCK_TIMEOUT = 120
+
+# Versions recorded in schema_migrations, loaded by run()
+applied: Set[int] = set()
+
+
+async def add_column(table: str, column: str, definition: str):
+    """ALTER TABLE ... ADD COLUMN unless the column exists (databases created from db.sql already have it)"""
+    existing = await database.fetch_all(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+    if not existing:
+        await database.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"✅ Added {table}.{column}")
+
+
+async def add_index(table: str, name: str, columns: str, kind: str = "INDEX"):
+    """ALTER TABLE ... ADD INDEX unless an index with that name exists"""
+    existing = await database.fetch_all(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if not existing:
+        await database.execute(f"ALTER TABLE {table} ADD {kind} {name} ({columns})")
+        print(f"✅ Created {kind.lower()} {name} on {table}")
+
+
+# ============== Migrations ==============
+# Append new migrations with the next version number; never renumber or edit applied ones.
+
+async def m001_component_starting_date():
+    """Move starting_date from scheme to component"""
+    await add_column("component", "starting_date", "DATE")
+    # Copy dates only while scheme still has the old column
+    if await database.fetch_all("SHOW COLUMNS FROM scheme LIKE 'starting_date'"):
+        await database.execute("""
+            UPDATE component c
+            JOIN scheme s ON c.gs_no = s.gs_no
+            SET c.starting_date = s.starting_date
+            WHERE c.starting_date IS NULL AND s.starting_date IS NOT NULL
+        """)
+        print("✅ Copied starting_date from schemes to components")
+
+
+async def m002_report_tables():
+    """Report job, data version and image file index tables"""
+    await report_jobs.ensure_table()
+    await report_cache.ensure_table()
+    await image_store.ensure_table()
+
+
+async def m003_search_fulltext_indexes():
+    """FULLTEXT indexes used by scheme_search"""
+    await scheme_search.ensure_indexes()
+
+
+async def m004_hot_query_indexes():
+    """Composite indexes for the list, image and keyset pagination queries"""
+    # Components of a scheme in comp_id order (component list, reports, scheme delete)
+    await add_index("component", "idx_component_gs_no_comp_id", "gs_no, comp_id")
+    # Images of a component by type (component endpoints, image list updates)
+    await add_index("component_images", "idx_component_images_comp_type", "comp_id, image_type")
+    # Whitelisted sort keys; InnoDB appends the primary key, giving (column, pk) keyset order
+    for column in ("sr_no", "name_of_scheme", "physical_progress", "total_allocation", "updated_at"):
+        await add_index("scheme", f"idx_scheme_{column}", column)
+    for column in ("component_name", "created_at"):
+        await add_index("component", f"idx_component_{column}", column)
+
+
+async def m005_component_image_order():
+    """Explicit photo order for component images, so lists can be updated in place"""
+    existing = await database.fetch_all("SHOW COLUMNS FROM component_images LIKE 'sort_order'")
+    await add_column("component_images", "sort_order", "INT NOT NULL DEFAULT 0")
+    if not existing:
+        # Insertion order was the display order; ids preserve it within each component and type
+        await database.execute("UPDATE component_images SET sort_order = id")
+    await add_index("component_images", "idx_component_images_order", "comp_id, image_type, sort_order")
+    # Superseded by the index above
+    if await database.fetch_all("SHOW INDEX FROM component_images WHERE Key_name = 'idx_component_images_comp_type'"):
+        await database.execute("ALTER TABLE component_images DROP INDEX idx_component_images_comp_type")
+
+
+async def m006_image_file_last_uploaded():
+    """Upload time of shared files, so the orphan sweep spares re-uploaded ones"""
+    await add_column("image_file", "last_uploaded_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+
+
+MIGRATIONS: List[Tuple[int, Callable[[], Awaitable[None]]]] = [
+    (1, m001_component_starting_date),
+    (2, m002_report_tables),
+    (3, m003_search_fulltext_indexes),
+    (4, m004_hot_query_indexes),
+    (5, m005_component_image_order),
+    (6, m006_image_file_last_uploaded),
+]
+
+
+def _name(migration: Callable) -> str:
+    return migration.__name__.split('_', 1)[1]
+
+
+def is_applied(migration: Callable) -> bool:
+    """Whether a migration has been recorded as applied (after run())"""
+    return any(version in applied for version, func in MIGRATIONS if func is migration)
+
+
+async def _load_applied() -> Set[int]:
+    rows = await database.fetch_all("SELECT version FROM schema_migrations")
+    return {row['version'] for row in rows}
+
+
+async def run() -> List[int]:
+    """
+    Apply pending migrations in version order, each exactly once
+
+    Returns after a version check when everything is applied.
+    Otherwise takes a MySQL named lock so concurrent workers wait for a
+    single runner instead of racing the same ALTERs.
+
+    Returns:
+        Versions applied by this call
+    """
+    global applied
+    await database.execute(SCHEMA_MIGRATIONS_TABLE_SQL)
+    applied = await _load_applied()
+    if all(version in applied for version, _ in MIGRATIONS):
+        return []
+
+    newly_applied = []
+    async with database.named_lock(LOCK_NAME, LOCK_TIMEOUT) as locked:
+        if not locked:
+            raise RuntimeError(f"Timed out waiting for migration lock '{LOCK_NAME}'")
+        # Another worker may have applied them while we waited
+        applied = await _load_applied()
+        for version, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"🛠️ Running migration {version:03d}: {_name(migration)}")
+            await migration()
+            await database.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, _name(migration))
+            )
+            applied.add(version)
+            newly_applied.append(version)
+
+    print(f"✅ Applied {len(newly_applied)} migration(s)")
+    return newly_applied
+
+
+async def status() -> List[Tuple[int, str, bool]]:
+    """(version, name, applied) for every known migration"""
+    await database.execute(SCHEMA_MIGRATIONS_TABLE_SQL)
+    done = await _load_applied()
+    return [(version, _name(migration), version in done) for version, migration in MIGRATIONS]
+
+
+if __name__ == '__main__':
+    async def _main():
+        await database.create_pool()
+        try:
+            if '--status' in sys.argv:
+                for version, name, done in await status():
+                    print(f"{version:03d} {name:<32} {'applied' if done else 'pending'}")
+            else:
+                await run()
+        finally:
+            await database.close_pool()
+
+    asyncio.run(_main())
@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, List, Tuple, Any, Iterable
+
+
+class PaginationError(ValueError):
+    """Raised for invalid cursor, sort or fields parameters"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    raise TypeError(f"Unsupported cursor value {value!r}")
+
+
+def encode_cursor(sort_value: Any, pk_value: Any) -> str:
+    """Opaque cursor pointing just after a row"""
+    raw = json.dumps([sort_value, pk_value], default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Inverse of encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, pk_value = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, pk_value
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def parse_sort(sort: Optional[str], allowed: Iterable[str], default: str) -> Tuple[str, bool]:
+    """
+    Parse a sort parameter like 'name_of_scheme' or '-physical_progress'
+
+    Returns:
+        Tuple of (column, descending)
+    """
+    if not sort:
+        return default, False
+    descending = sort.startswith('-')
+    column = sort.lstrip('-+')
+    if column not in allowed:
+        raise PaginationError(f"Invalid sort key '{column}'. Allowed: {', '.join(sorted(allowed))}")
+    return column, descending
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Parse a comma-separated fields parameter, None means all fields"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}")
+    return requested
+
+
+def order_clause(column: str, pk: str, descending: bool) -> str:
+    """ORDER BY matching keyset_clause (the primary key breaks ties)"""
+    direction = 'DESC' if descending else 'ASC'
+    if column == pk:
+        return f"ORDER BY {pk} {direction}"
+    return f"ORDER BY {column} {direction}, {pk} {direction}"
+
+
+def keyset_clause(column: str, pk: str, descending: bool, cursor: Optional[str]) -> Tuple[str, list]:
+    """
+    WHERE condition selecting rows after the cursor
+
+    MySQL sorts NULLs first ascending and last descending; the condition
+    follows the same order so nullable sort columns page correctly.
+
+    Returns:
+        Tuple of (SQL condition or '', params)
+    """
+    if not cursor:
+        return '', []
+    value, pk_value = decode_cursor(cursor)
+    op = '<' if descending else '>'
+
+    if column == pk:
+        return f"{pk} {op} %s", [pk_value]
+
+    if value is None:
+        if descending:
+            return f"({column} IS NULL AND {pk} < %s)", [pk_value]
+        return f"(({column} IS NULL AND {pk} > %s) OR {column} IS NOT NULL)", [pk_value]
+
+    condition = f"({column} {op} %s OR ({column} = %s AND {pk} {op} %s)"
+    if descending:
+        condition += f" OR {column} IS NULL"
+    return condition + ")", [value, value, pk_value]
+
+
+def paginate(rows: List[Any], column: Any, pk: Any, limit: Optional[int]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim rows fetched with LIMIT limit + 1 to one page
+
+    Rows are dicts keyed by column/pk names, or tuples (database.fetch_rows)
+    with column/pk given as positions.
+
+    Returns:
+        Tuple of (page rows, cursor for the next page or None on the last page)
+    """
+    if not limit or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[column], last[pk])
@@ -0,0 +1,211 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, List, BinaryIO
+
+from config import TEMPLATE_DIR, RENDER_WORKERS, RENDER_MAX_CONCURRENCY, RENDER_TIMEOUT, REPORT_BACKEND
+
+# Global render pool and concurrency limit
+executor: Optional[ProcessPoolExecutor] = None
+semaphore: Optional[asyncio.Semaphore] = None
+
+# Per-process Jinja environment, created on first use inside a worker
+_jinja_env = None
+
+
+class RenderError(Exception):
+    """Raised when a backend fails to produce a PDF"""
+
+
+class RenderTimeoutError(RenderError):
+    """Raised when a render job exceeds its timeout"""
+
+
+# ============== Worker-side functions (run in child processes) ==============
+
+def render_template(template_name: str, context: Dict[str, Any]) -> str:
+    """Render a Jinja template from the templates directory to HTML"""
+    global _jinja_env
+    if _jinja_env is None:
+        from jinja2 import Environment, FileSystemLoader
+        _jinja_env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
+    return _jinja_env.get_template(template_name).render(**context)
+
+
+def html_to_pdf(html_content: str, output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    """
+    Convert an HTML string to PDF with xhtml2pdf
+
+    Writes into output when given (returns None), otherwise returns the PDF bytes.
+    """
+    from xhtml2pdf import pisa
+
+    pdf_buffer = output if output is not None else io.BytesIO()
+    pisa_status = pisa.CreatePDF(io.StringIO(html_content), dest=pdf_buffer)
+    if pisa_status.err:
+        raise RenderError(f"xhtml2pdf reported {pisa_status.err} error(s)")
+    return None if output is not None else pdf_buffer.getvalue()
+
+
+def template_to_pdf(template_name: str, context: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    """Render a template and convert it to PDF in one worker call"""
+    return html_to_pdf(render_template(template_name, context), output)
+
+
+def reportlab_to_pdf(context: Dict[str, Any], output: BinaryIO):
+    """Draw the report.html context directly with ReportLab"""
+    import report_reportlab
+    report_reportlab.build(context, output)
+
+
+# Report backends: name -> worker function writing a report.html context as PDF into a binary file
+REPORT_BACKENDS = {
+    'xhtml2pdf': lambda context, output: template_to_pdf("report.html", context, output),
+    'reportlab': reportlab_to_pdf,
+}
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """The requested report backend, or REPORT_BACKEND; ValueError for unknown names"""
+    backend = name or REPORT_BACKEND
+    if backend not in REPORT_BACKENDS:
+        raise ValueError(f"Unknown report backend '{backend}'. Allowed: {', '.join(REPORT_BACKENDS)}")
+    return backend
+
+
+def _write_atomic(dest: str, write) -> int:
+    """Call write(file) on a temp file next to dest, rename it into place and return its size"""
+    tmp_path = f"{dest}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+            size = f.tell()
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return size
+
+
+def report_to_file(backend: str, context: Dict[str, Any], dest: str) -> int:
+    """Render a report context straight into a PDF file (written atomically), returning its size"""
+    return _write_atomic(dest, lambda f: REPORT_BACKENDS[backend](context, f))
+
+
+def merge_pdfs(paths: List[str], dest: str) -> int:
+    """Concatenate PDF files in order with pypdf into dest (written atomically), returning its size"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    try:
+        for path in paths:
+            writer.append(path)
+        return _write_atomic(dest, writer.write)
+    finally:
+        writer.close()
+
+
+# ============== Pool management ==============
+
+def _new_pool() -> ProcessPoolExecutor:
+    # spawn avoids forking the parent's event loop and DB pool sockets
+    return ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def start_executor():
+    """Create the render process pool"""
+    global executor, semaphore
+    executor = _new_pool()
+    semaphore = asyncio.Semaphore(RENDER_MAX_CONCURRENCY)
+    return executor
+
+
+def shutdown_executor():
+    """Shut down the render process pool"""
+    global executor
+    if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+
+
+def _recycle_executor(pool: ProcessPoolExecutor):
+    """
+    Replace the pool with a fresh one and kill its workers
+
+    A render past its timeout may never return, and a started job can't be
+    cancelled; killing its process is the only way to free the worker.
+    Other jobs running in the old pool fail with RenderError.
+    """
+    global executor
+    if executor is pool:
+        executor = _new_pool()
+    # ProcessPoolExecutor has no public way to stop running workers before 3.14
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    print(f"⚠️ Warning: Render pool recycled after a timeout ({len(processes)} worker(s) stopped)")
+
+
+def _release_when_done(future, slot: asyncio.Semaphore):
+    """Give the concurrency slot back when the job itself ends, not when its caller stops waiting"""
+    loop = asyncio.get_running_loop()
+
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(slot.release)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    future.add_done_callback(release)
+
+
+async def run_in_executor(func, *args, timeout: Optional[float] = None) -> Any:
+    """
+    Run a worker function in the render pool
+
+    On timeout the pool is recycled, so a hung render can't keep holding a
+    worker process and a concurrency slot.
+
+    Args:
+        func: Module-level (picklable) function to run
+        args: Arguments passed to func
+        timeout: Seconds to wait for the result, RENDER_TIMEOUT if None
+
+    Returns:
+        The function's return value
+    """
+    if not executor:
+        start_executor()
+
+    slot = semaphore
+    await slot.acquire()
+    pool = executor
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slot.release()
+        raise
+    _release_when_done(future, slot)
+
+    timeout = timeout or RENDER_TIMEOUT
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        if not future.cancel():
+            # Already running: stop its process (and the pool's other workers)
+            _recycle_executor(pool)
+        raise RenderTimeoutError(f"Render exceeded {timeout}s timeout")
+    except BrokenProcessPool as e:
+        raise RenderError(f"Render worker stopped before finishing: {e}") from e
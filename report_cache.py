@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional, List, Dict
+
+import database
+from config import (
+    TEMPLATE_DIR, BASE_DIR, REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES, REPORT_CACHE_MAX_ENTRIES,
+    RENDITION_SIZES, RENDITION_JPEG_QUALITY
+)
+
+DATA_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS data_version (
+        name VARCHAR(64) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+# Files whose content changes the rendered report
+REPORT_INPUT_FILES = [
+    TEMPLATE_DIR / 'report.html',
+    BASE_DIR / 'report_reportlab.py',
+    BASE_DIR / 'assets' / 'report_cover.png',
+]
+
+# (path, mtime) -> sha256, so unchanged template files aren't re-hashed per request
+_file_hashes: Dict[tuple, str] = {}
+
+
+async def ensure_table():
+    """Create the data_version table if it doesn't exist"""
+    await database.execute(DATA_VERSION_TABLE_SQL)
+
+
+async def bump_version(name: str = 'report', db=database):
+    """
+    Invalidate cached reports after a scheme/component/image write
+
+    Pass a database.Transaction as db to bump inside the write's transaction.
+    """
+    try:
+        await db.execute(
+            "INSERT INTO data_version (name, version) VALUES (%s, 1) ON DUPLICATE KEY UPDATE version = version + 1",
+            (name,)
+        )
+    except Exception as e:
+        # Inside a transaction the error may have rolled it back; let the caller see it
+        if isinstance(db, database.Transaction):
+            raise
+        print(f"⚠️ Warning: Could not bump data version '{name}': {e}")
+
+
+async def get_version(name: str = 'report') -> Optional[int]:
+    """Current value of a data version counter, None if it was never bumped"""
+    row = await database.fetch_one("SELECT version FROM data_version WHERE name = %s", (name,))
+    return row['version'] if row else None
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of a file, memoized on its mtime"""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return ''
+    key = (str(path), mtime)
+    if key not in _file_hashes:
+        _file_hashes[key] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return _file_hashes[key]
+
+
+async def compute_fingerprint(gs_nos: Optional[List[int]] = None, backend: Optional[str] = None) -> str:
+    """
+    Fingerprint of everything that goes into the report
+
+    Combines the data version counter, scheme/component/image row versions,
+    the template and cover asset hashes, rendition settings and today's
+    date (printed on the report).
+
+    Args:
+        gs_nos: Optional list of schemes in the report, all schemes if None
+        backend: Report backend that renders it
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    row = await database.fetch_one("""
+        SELECT
+            (SELECT version FROM data_version WHERE name = 'report') AS data_version,
+            (SELECT MAX(updated_at) FROM scheme) AS scheme_updated_at,
+            (SELECT COUNT(*) FROM scheme) AS scheme_count,
+            (SELECT COUNT(*) FROM component) AS component_count,
+            (SELECT MAX(comp_id) FROM component) AS component_max_id,
+            (SELECT COUNT(*) FROM component_images) AS image_count,
+            (SELECT MAX(id) FROM component_images) AS image_max_id
+    """)
+    parts = {
+        "data": {k: str(v) for k, v in (row or {}).items()},
+        "files": [file_hash(path) for path in REPORT_INPUT_FILES],
+        "renditions": [RENDITION_SIZES['report'], RENDITION_JPEG_QUALITY],
+        "gs_nos": sorted(set(gs_nos)) if gs_nos else None,
+        "backend": backend,
+        "date": date.today().isoformat(),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def path_for(fingerprint: str) -> Path:
+    """Where the PDF for a fingerprint is stored; render straight into it, then call evict()"""
+    return REPORT_CACHE_DIR / f"{fingerprint}.pdf"
+
+
+def get(fingerprint: str) -> Optional[Path]:
+    """Return the cached PDF for a fingerprint, marking it recently used"""
+    path = path_for(fingerprint)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def evict(
+    max_bytes: int = REPORT_CACHE_MAX_BYTES,
+    max_entries: int = REPORT_CACHE_MAX_ENTRIES,
+    directory: Path = REPORT_CACHE_DIR,
+    keep_newer_than: float = 0
+):
+    """
+    Remove least recently used cache entries until size and count limits hold
+
+    Entries used within the last keep_newer_than seconds are never removed
+    (they may be about to be read), even if the limits are exceeded for a while.
+    """
+    entries = []
+    for path in directory.glob("*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    entries.sort(key=lambda e: e[0])
+    total = sum(size for _, size, _ in entries)
+    count = len(entries)
+    cutoff = time.time() - keep_newer_than
+    while entries and entries[0][0] < cutoff and (total > max_bytes or count > max_entries):
+        _, size, path = entries.pop(0)
+        count -= 1
+        try:
+            path.unlink()
+            total -= size
+            print(f"🧹 Evicted cached report {path.name}")
+        except FileNotFoundError:
+            pass
+
+
+async def get_async(fingerprint: str) -> Optional[Path]:
+    """get() without blocking the event loop"""
+    return await asyncio.to_thread(get, fingerprint)
+
+
+async def evict_async():
+    """evict() without blocking the event loop"""
+    await asyncio.to_thread(evict)
@@ -0,0 +1,200 @@
+import asyncio
+from collections import defaultdict
+from datetime import date
+from itertools import zip_longest
+from typing import Optional, List, Dict, Any, Iterable
+
+import database
+import image_renditions
+from config import BASE_DIR, BEFORE_IMAGE_DIR, AFTER_IMAGE_DIR
+
+# Max number of ids sent in a single IN (...) clause
+IN_BATCH_SIZE = 1000
+
+# group_images() default for components without images (read-only)
+EMPTY_IMAGES: Dict[str, List[Dict]] = {'before': [], 'after': []}
+
+
+async def fetch_in_batches(query: str, ids: List[Any], batch_size: int = IN_BATCH_SIZE) -> List[Dict]:
+    """
+    Run a query containing a single `{ids}` placeholder for an IN list,
+    splitting the ids into fixed-size batches
+
+    Args:
+        query: SQL query with `{ids}` where the IN list goes
+        ids: Values for the IN list
+        batch_size: Max number of ids per query
+
+    Returns:
+        Concatenated rows from all batches
+    """
+    rows = []
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        format_strings = ','.join(['%s'] * len(batch))
+        rows.extend(await database.fetch_all(query.format(ids=format_strings), tuple(batch)))
+    return rows
+
+
+def group_by(rows: Iterable[Dict], key: str) -> Dict[Any, List[Dict]]:
+    """Group rows into a dict of key value -> list of rows, preserving order"""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row[key]].append(row)
+    return grouped
+
+
+async def load_schemes(gs_nos: Optional[List[int]] = None) -> List[Dict]:
+    """Fetch schemes ordered by gs_no, optionally restricted to the given gs_nos"""
+    if gs_nos is None:
+        return await database.fetch_all("SELECT * FROM scheme ORDER BY gs_no")
+    schemes = await fetch_in_batches("SELECT * FROM scheme WHERE gs_no IN ({ids})", list(gs_nos))
+    return sorted(schemes, key=lambda s: s['gs_no'])
+
+
+async def load_components(gs_nos: Optional[List[int]] = None) -> List[Dict]:
+    """Fetch components ordered by comp_id, optionally restricted to the given schemes"""
+    if gs_nos is None:
+        return await database.fetch_all("SELECT * FROM component ORDER BY comp_id")
+    components = await fetch_in_batches("SELECT * FROM component WHERE gs_no IN ({ids})", list(gs_nos))
+    return sorted(components, key=lambda c: c['comp_id'])
+
+
+async def load_images(comp_ids: List[int]) -> List[Dict]:
+    """Fetch image rows for the given components in display order"""
+    if not comp_ids:
+        return []
+    return await fetch_in_batches(
+        "SELECT id, comp_id, image_path, image_type FROM component_images WHERE comp_id IN ({ids}) ORDER BY sort_order, id",
+        list(comp_ids)
+    )
+
+
+def split_images(images: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """Split one component's image rows into {'before': [...], 'after': [...]}, preserving order"""
+    split = {'before': [], 'after': []}
+    for img in images:
+        if img['image_type'] in split:
+            split[img['image_type']].append(img)
+    return split
+
+
+def group_images(images: Iterable[Dict]) -> Dict[Any, Dict[str, List[Dict]]]:
+    """
+    Group image rows in a single pass into comp_id -> {'before': [...], 'after': [...]}
+
+    Components without images are absent, look them up with EMPTY_IMAGES as the default.
+    """
+    grouped = defaultdict(lambda: {'before': [], 'after': []})
+    for img in images:
+        if img['image_type'] in ('before', 'after'):
+            grouped[img['comp_id']][img['image_type']].append(img)
+    return grouped
+
+
+def image_paths(split: Dict[str, List[Dict]]) -> Dict[str, List[str]]:
+    """Filenames from split_images/group_images output as {'before_images': [...], 'after_images': [...]}"""
+    return {
+        'before_images': [img['image_path'] for img in split['before']],
+        'after_images': [img['image_path'] for img in split['after']],
+    }
+
+
+def image_full_path(image_path: str, image_type: str) -> str:
+    """Local filesystem path of an uploaded image"""
+    return str((BEFORE_IMAGE_DIR if image_type == 'before' else AFTER_IMAGE_DIR) / image_path)
+
+
+def build_image_pairs(images: Dict[str, List[Dict]], renditions: Optional[Dict[tuple, Any]] = None) -> List[tuple]:
+    """
+    Pair before/after images for the report template (one pair per page)
+
+    Args:
+        images: One component's images as returned by split_images/group_images
+        renditions: Optional (image_type, image_path) -> file to embed instead of the original
+    """
+    def embed(img: Dict) -> Dict:
+        key = (img['image_type'], img['image_path'])
+        if renditions and key in renditions:
+            full_path = str(renditions[key])
+        else:
+            full_path = image_full_path(img['image_path'], img['image_type'])
+        return {"path": img['image_path'], "full_path": full_path}
+
+    before_list = [embed(img) for img in images['before']]
+    after_list = [embed(img) for img in images['after']]
+    return list(zip_longest(before_list, after_list, fillvalue=None))
+
+
+async def load_report_data(gs_nos: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Load schemes with their components and image pairs for the PDF report.
+
+    Uses one query for schemes, one for components and one for images
+    (plus extra IN batches for very large portfolios) instead of a query
+    per scheme and per component.
+
+    Args:
+        gs_nos: Optional list of schemes to load, all schemes if None
+
+    Returns:
+        Schemes ordered by gs_no, each with a `components` list whose
+        entries carry `image_pairs`
+    """
+    schemes = await load_schemes(gs_nos)
+    if not schemes:
+        return schemes
+
+    if gs_nos is None:
+        components = await load_components()
+    else:
+        components = await load_components([s['gs_no'] for s in schemes])
+
+    images = await load_images([c['comp_id'] for c in components])
+    images_by_comp = group_images(images)
+
+    # Embed report-sized renditions rather than full-resolution uploads,
+    # creating any that are missing off the event loop
+    active_ids = {c['comp_id'] for c in components if c.get('is_active', True)}
+    renditions = await asyncio.to_thread(
+        image_renditions.ensure_renditions,
+        [(img['image_type'], img['image_path']) for img in images if img['comp_id'] in active_ids],
+        'report'
+    )
+
+    for comp in components:
+        # Only process images if the component is active
+        if comp.get('is_active', True):
+            comp['image_pairs'] = build_image_pairs(images_by_comp.get(comp['comp_id'], EMPTY_IMAGES), renditions)
+        else:
+            comp['image_pairs'] = []
+
+    components_by_scheme = group_by(components, 'gs_no')
+    for scheme in schemes:
+        scheme['components'] = components_by_scheme.get(scheme['gs_no'], [])
+
+    return schemes
+
+
+def count_image_pages(schemes: List[Dict]) -> int:
+    """Number of before/after image pages the report will contain"""
+    return sum(
+        len(comp['image_pairs'])
+        for scheme in schemes
+        for comp in scheme['components']
+        if comp.get('is_active', True)
+    )
+
+
+def report_context(schemes: List[Dict]) -> Dict[str, Any]:
+    """Template context for templates/report.html"""
+    return {
+        "schemes": schemes,
+        "today": date.today().strftime("%d-%m-%Y"),
+        "cover_image_path": str(BASE_DIR / "assets" / "report_cover.png")
+    }
+
+
+def report_filename() -> str:
+    """Download filename for the full report"""
+    return f"Priority_Projects_Report_{date.today().strftime('%d_%m_%Y')}.pdf"
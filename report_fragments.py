@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+
+import render_worker
+import report_cache
+import report_data
+from config import (
+    BASE_DIR, TEMPLATE_DIR, REPORT_FRAGMENT_DIR, REPORT_FRAGMENT_CACHE_MAX_BYTES, REPORT_FRAGMENT_CACHE_MAX_ENTRIES,
+    RENDITION_SIZES, RENDITION_JPEG_QUALITY, RENDER_TIMEOUT
+)
+
+# File whose content decides how each backend lays pages out
+BACKEND_SOURCES = {
+    'xhtml2pdf': TEMPLATE_DIR / 'report.html',
+    'reportlab': BASE_DIR / 'report_reportlab.py',
+}
+
+# Scheme columns printed in the summary table
+SUMMARY_SCHEME_FIELDS = [
+    'gs_no', 'name_of_scheme', 'physical_progress', 'total_allocation', 'funds_released',
+    'committed_fund_utilization', 'labour_deployed', 'remarks'
+]
+SUMMARY_COMPONENT_FIELDS = ['component_name', 'starting_date']
+
+# Fragments used this recently may belong to a report still being merged, so eviction leaves them alone
+FRAGMENT_IN_USE_SECONDS = 2 * RENDER_TIMEOUT
+
+stats = {"rendered": 0, "reused": 0}
+
+
+def _key(backend: str, section: str, payload: Any) -> str:
+    """Cache key of a fragment: its backend and section, the backend's layout source and exactly the data it prints"""
+    parts = {
+        "backend": backend,
+        "section": section,
+        "layout": report_cache.file_hash(BACKEND_SOURCES[backend]),
+        "payload": payload,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def summary_payload(schemes: List[Dict]) -> List[Dict]:
+    """Summary table rows: scheme columns and component names/dates, without image pairs"""
+    return [
+        {
+            **{field: scheme.get(field) for field in SUMMARY_SCHEME_FIELDS},
+            "components": [{field: comp.get(field) for field in SUMMARY_COMPONENT_FIELDS} for comp in scheme['components']],
+        }
+        for scheme in schemes
+    ]
+
+
+def image_payload(scheme: Dict) -> Dict:
+    """What a scheme's image pages print; uploads are content-addressed, so paths identify pixels"""
+    return {
+        "name_of_scheme": scheme.get('name_of_scheme'),
+        "renditions": [RENDITION_SIZES['report'], RENDITION_JPEG_QUALITY],
+        "components": [
+            {
+                "component_name": comp.get('component_name'),
+                "pairs": [[image['path'] if image else None for image in pair] for pair in comp['image_pairs']],
+            }
+            for comp in scheme['components']
+            if comp.get('is_active', True) and comp['image_pairs']
+        ],
+    }
+
+
+def plan(schemes: List[Dict], backend: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Fragments making up the full report, in page order
+
+    The cover, the summary table (one table spanning every scheme, so it
+    stays one fragment) and each scheme's before/after image pages.
+    Schemes without image pages contribute no fragment.
+
+    Returns:
+        List of (cache key, template context)
+    """
+    base = report_data.report_context(schemes)
+    today = base['today']
+    fragments = [
+        (_key(backend, 'cover', report_cache.file_hash(Path(base['cover_image_path']))), {**base, "schemes": [], "sections": ['cover']}),
+    ]
+
+    summary_schemes = summary_payload(schemes)
+    fragments.append((_key(backend, 'summary', [today, summary_schemes]), {**base, "schemes": summary_schemes, "sections": ['summary']}))
+
+    for scheme in schemes:
+        payload = image_payload(scheme)
+        if payload['components']:
+            fragments.append((_key(backend, 'images', [today, payload]), {**base, "schemes": [scheme], "sections": ['images']}))
+    return fragments
+
+
+def fragment_pages(context: Dict[str, Any]) -> int:
+    """Pages a fragment is expected to add: one for the cover or summary, one per image pair"""
+    if context['sections'] == ['images']:
+        return report_data.count_image_pages(context['schemes'])
+    return 1
+
+
+def fragment_path(key: str) -> Path:
+    return REPORT_FRAGMENT_DIR / f"{key}.pdf"
+
+
+def _touch(path: Path) -> bool:
+    """Mark a cached fragment recently used; False if it isn't cached"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+async def render_report(
+    schemes: List[Dict],
+    dest: Path,
+    backend: Optional[str] = None,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+) -> int:
+    """
+    Render the full report from cached fragments, rendering only those whose data changed
+
+    Missing fragments render in parallel on the render pool; a worker then
+    merges the fragments in page order straight into dest, so the
+    document never passes through this process's memory.
+
+    Args:
+        schemes: Output of report_data.load_report_data
+        dest: File the merged PDF is written to (atomically)
+        backend: Report backend name, REPORT_BACKEND if None
+        on_progress: Awaited with the number of pages done so far, once for
+            the reused fragments and again as each missing fragment finishes
+
+    Returns:
+        Size of the written PDF in bytes
+    """
+    backend = render_worker.resolve_backend(backend)
+    fragments = plan(schemes, backend)
+    paths = [fragment_path(key) for key, _ in fragments]
+    cached = await asyncio.to_thread(lambda: [_touch(path) for path in paths])
+
+    missing = [(path, context) for path, (_, context), hit in zip(paths, fragments, cached) if not hit]
+    pages_done = sum(fragment_pages(context) for (_, context), hit in zip(fragments, cached) if hit)
+    if on_progress:
+        await on_progress(pages_done)
+
+    async def render(path: Path, context: Dict[str, Any]):
+        nonlocal pages_done
+        await render_worker.run_in_executor(render_worker.report_to_file, backend, context, str(path))
+        pages_done += fragment_pages(context)
+        if on_progress:
+            await on_progress(pages_done)
+
+    if missing:
+        await asyncio.gather(*[render(path, context) for path, context in missing])
+    stats["rendered"] += len(missing)
+    stats["reused"] += len(fragments) - len(missing)
+    print(f"🧩 Report fragments: {len(fragments) - len(missing)} reused, {len(missing)} rendered")
+
+    # Eviction skips recently used fragments, but one touched before a long render
+    # may still have gone (e.g. removed by another worker process); render it again
+    present = await asyncio.to_thread(lambda: [_touch(path) for path in paths])
+    lost = [(path, context) for path, (_, context), hit in zip(paths, fragments, present) if not hit]
+    if lost:
+        print(f"⚠️ Warning: {len(lost)} report fragment(s) were evicted before merging, rendering them again")
+        await asyncio.gather(*[
+            render_worker.run_in_executor(render_worker.report_to_file, backend, context, str(path))
+            for path, context in lost
+        ])
+
+    size = await render_worker.run_in_executor(render_worker.merge_pdfs, [str(path) for path in paths], str(dest))
+    if missing:
+        await asyncio.to_thread(
+            report_cache.evict, REPORT_FRAGMENT_CACHE_MAX_BYTES, REPORT_FRAGMENT_CACHE_MAX_ENTRIES, REPORT_FRAGMENT_DIR,
+            FRAGMENT_IN_USE_SECONDS
+        )
+    return size
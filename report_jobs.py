@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import shutil
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Optional, List, Dict, Set, Tuple
+
+import aiomysql
+
+import database
+import report_data
+import report_cache
+import report_fragments
+import render_worker
+from config import REPORT_DIR, REPORT_JOB_STALE_SECONDS
+
+REPORT_JOB_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS report_job (
+        job_id CHAR(36) PRIMARY KEY,
+        job_key VARCHAR(64) NOT NULL,
+        active_key VARCHAR(64) UNIQUE,
+        params TEXT,
+        status ENUM('queued', 'loading', 'rendering', 'completed', 'failed') DEFAULT 'queued',
+        schemes_loaded INT DEFAULT 0,
+        total_pages INT,
+        pages_rendered INT DEFAULT 0,
+        file_path VARCHAR(255),
+        file_size BIGINT,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP NULL
+    )
+"""
+
+# Strong references to running job tasks so they aren't garbage collected
+_tasks: Set[asyncio.Task] = set()
+
+
+def job_key(gs_nos: Optional[List[int]], backend: Optional[str] = None) -> str:
+    """Key identifying identical report requests for the current day"""
+    params = {"gs_nos": sorted(set(gs_nos)) if gs_nos else None, "backend": backend, "date": date.today().isoformat()}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+async def ensure_table():
+    """Create the report_job table if it doesn't exist"""
+    await database.execute(REPORT_JOB_TABLE_SQL)
+
+
+async def get_job(job_id: str) -> Optional[Dict]:
+    """Fetch a single job row"""
+    return await database.fetch_one("SELECT * FROM report_job WHERE job_id = %s", (job_id,))
+
+
+async def update_job(job_id: str, **fields):
+    """Update columns of a job row"""
+    assignments = ', '.join(f"{column} = %s" for column in fields)
+    await database.execute(
+        f"UPDATE report_job SET {assignments} WHERE job_id = %s",
+        tuple(fields.values()) + (job_id,)
+    )
+
+
+async def _record_pages(job_id: str, pages_rendered: int):
+    """Progress callback for report_fragments.render_report"""
+    try:
+        # Fragments finish concurrently, so never move the counter backwards
+        await database.execute(
+            "UPDATE report_job SET pages_rendered = GREATEST(pages_rendered, %s) WHERE job_id = %s",
+            (pages_rendered, job_id)
+        )
+    except Exception as e:
+        print(f"⚠️ Warning: Could not record progress of report job {job_id}: {e}")
+
+
+async def _expire_stale_job(key: str):
+    """Release the active key of a job whose worker stopped updating it"""
+    await database.execute(
+        """
+            UPDATE report_job
+            SET status = 'failed', active_key = NULL, error = 'Job abandoned', finished_at = NOW()
+            WHERE active_key = %s AND updated_at < NOW() - INTERVAL %s SECOND
+        """,
+        (key, REPORT_JOB_STALE_SECONDS)
+    )
+
+
+async def create_job(gs_nos: Optional[List[int]] = None, backend: Optional[str] = None) -> Tuple[Dict, bool]:
+    """
+    Enqueue a report job, or return the already active job for the same request
+
+    Args:
+        gs_nos: Optional list of schemes to include, all schemes if None
+        backend: Report backend name, REPORT_BACKEND if None
+
+    Returns:
+        Tuple of (job row, True if a new job was created)
+    """
+    backend = render_worker.resolve_backend(backend)
+    key = job_key(gs_nos, backend)
+    params = json.dumps({"gs_nos": gs_nos, "backend": backend})
+
+    for _ in range(2):
+        job_id = str(uuid.uuid4())
+        try:
+            await database.execute(
+                "INSERT INTO report_job (job_id, job_key, active_key, params, status) VALUES (%s, %s, %s, %s, 'queued')",
+                (job_id, key, key, params)
+            )
+        except aiomysql.IntegrityError:
+            # A job for the same request is already queued or running
+            existing = await database.fetch_one("SELECT * FROM report_job WHERE active_key = %s", (key,))
+            if existing:
+                await _expire_stale_job(key)
+                still_active = await database.fetch_one("SELECT * FROM report_job WHERE active_key = %s", (key,))
+                if still_active:
+                    return still_active, False
+            continue
+
+        task = asyncio.create_task(run_job(job_id, gs_nos, backend))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+        return await get_job(job_id), True
+
+    raise RuntimeError("Could not enqueue report job")
+
+
+def _count_pages(path: Path) -> int:
+    """Number of pages in a PDF file"""
+    from pypdf import PdfReader
+    return len(PdfReader(str(path)).pages)
+
+
+async def run_job(job_id: str, gs_nos: Optional[List[int]] = None, backend: Optional[str] = None):
+    """Load data, render the PDF and store it under REPORT_DIR, recording progress"""
+    try:
+        path = REPORT_DIR / f"{job_id}.pdf"
+        fingerprint = await report_cache.compute_fingerprint(gs_nos, backend)
+        cached_path = await report_cache.get_async(fingerprint)
+
+        if not cached_path:
+            await update_job(job_id, status='loading')
+            schemes = await report_data.load_report_data(gs_nos)
+            # Cover + summary table (at least one page) + one page per image pair
+            await update_job(
+                job_id,
+                status='rendering',
+                schemes_loaded=len(schemes),
+                total_pages=2 + report_data.count_image_pages(schemes)
+            )
+
+            # Only fragments whose schemes changed since the last report are rendered;
+            # the merged PDF goes straight to the report cache on disk
+            cached_path = report_cache.path_for(fingerprint)
+            await report_fragments.render_report(
+                schemes, cached_path, backend,
+                on_progress=lambda pages: _record_pages(job_id, pages)
+            )
+
+        # The job keeps its own copy; cache entries can be evicted
+        await asyncio.to_thread(shutil.copyfile, cached_path, path)
+        await report_cache.evict_async()
+
+        file_size = path.stat().st_size
+        pages = await asyncio.to_thread(_count_pages, path)
+
+        await database.execute(
+            """
+                UPDATE report_job
+                SET status = 'completed', active_key = NULL, file_path = %s, file_size = %s,
+                    pages_rendered = %s, total_pages = %s, finished_at = NOW()
+                WHERE job_id = %s
+            """,
+            (path.name, file_size, pages, pages, job_id)
+        )
+        print(f"✅ Report job {job_id} completed ({pages} pages)")
+    except Exception as e:
+        print(f"❌ Report job {job_id} failed: {e}")
+        try:
+            await database.execute(
+                "UPDATE report_job SET status = 'failed', active_key = NULL, error = %s, finished_at = NOW() WHERE job_id = %s",
+                (str(e), job_id)
+            )
+        except Exception as db_e:
+            print(f"⚠️ Warning: Could not mark report job {job_id} as failed: {db_e}")
+
+
+def job_file_path(job: Dict) -> Optional[Path]:
+    """Local path of a completed job's PDF, if present"""
+    if job['status'] != 'completed' or not job['file_path']:
+        return None
+    path = REPORT_DIR / job['file_path']
+    return path if path.exists() else None
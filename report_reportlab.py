@@ -0,0 +1,236 @@
+from typing import Dict, Any, List, Optional, BinaryIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, Flowable, Table, TableStyle, Paragraph,
+    Spacer, PageBreak, NextPageTemplate
+)
+
+# Same page geometry as templates/report.html renders with xhtml2pdf
+PAGE_SIZE = landscape(A4)
+MARGIN = 1 * cm
+
+HEADER_BLUE = colors.HexColor('#1C4587')
+HEADING = colors.HexColor('#2c3e50')
+MUTED = colors.HexColor('#7f8c8d')
+FOOTER = colors.HexColor('#95a5a6')
+NO_IMAGE = colors.HexColor('#999999')
+BEFORE_COLOR = colors.HexColor('#e67e22')
+AFTER_COLOR = colors.HexColor('#27ae60')
+
+# Summary table columns: (header, relative width); None shares the remaining width
+COLUMNS = [
+    ("Sr. No.", 35), ("GS No.", 60), ("Name of Scheme", None), ("Components", 150), ("Starting Date", 100),
+    ("Physical Progress (%)", 50), ("Total Allocation (M)", 55), ("Funds Released (M)", 55),
+    ("Committed Funds Utilized (M)", 70), ("Labour Deployed", 55), ("Remarks", 250),
+]
+# Columns spanning all of a scheme's component rows
+SCHEME_COLUMNS = [0, 1, 2, 5, 6, 7, 8, 9, 10]
+IMAGE_BOX = 300  # points, the template's 400px image box
+
+CELL = ParagraphStyle('cell', fontName='Helvetica', fontSize=8, leading=9.5, textColor=colors.HexColor('#333333'))
+CELL_CENTER = ParagraphStyle('cell_center', parent=CELL, alignment=TA_CENTER)
+CELL_BOLD = ParagraphStyle('cell_bold', parent=CELL, fontName='Helvetica-Bold')
+CELL_BOLD_CENTER = ParagraphStyle('cell_bold_center', parent=CELL_BOLD, alignment=TA_CENTER)
+HEAD = ParagraphStyle('head', parent=CELL, fontName='Helvetica-Bold', textColor=colors.white, alignment=TA_CENTER)
+SUB_HEAD = ParagraphStyle('sub_head', parent=HEAD, fontSize=7, leading=8.5)
+TITLE = ParagraphStyle('title', parent=HEAD, fontSize=14, leading=17, textColor=colors.black)
+
+
+def _text(value: Any, default: str = '') -> str:
+    """Cell text the way the Jinja template prints it (`value or default`)"""
+    return escape(str(value)) if value else default
+
+
+def _column_widths(available: float) -> List[float]:
+    fixed = sum(width for _, width in COLUMNS if width)
+    flexible = 200
+    scale = available / (fixed + flexible)
+    return [(width or flexible) * scale for _, width in COLUMNS]
+
+
+def summary_table(schemes: List[Dict], today: str, available_width: float) -> Table:
+    """The overview table, one block of rows per scheme with scheme columns spanning its components"""
+    rows = [
+        [Paragraph(f"Overview of Priority Projects {escape(today)}", TITLE)] + [''] * 10,
+        [Paragraph(name, HEAD) for name, _ in COLUMNS[:5]] + [Paragraph("Financial Detail", HEAD), '', '', '']
+        + [Paragraph(name, HEAD) for name, _ in COLUMNS[9:]],
+        [''] * 5 + [Paragraph(name, SUB_HEAD) for name, _ in COLUMNS[5:9]] + [''] * 2,
+    ]
+    style = [
+        ('SPAN', (0, 0), (-1, 0)),
+        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.black),
+        ('SPAN', (5, 1), (8, 1)),
+        ('BACKGROUND', (0, 1), (-1, 2), HEADER_BLUE),
+        ('GRID', (0, 1), (-1, 2), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('VALIGN', (0, 1), (-1, 2), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ]
+    for column in [0, 1, 2, 3, 4, 9, 10]:
+        style.append(('SPAN', (column, 1), (column, 2)))
+
+    for index, scheme in enumerate(schemes, start=1):
+        components = scheme['components'] or [None]
+        first = len(rows)
+        last = first + len(components) - 1
+        for position, comp in enumerate(components, start=1):
+            if comp is None:
+                comp_cells = [Paragraph('-', CELL), Paragraph('-', CELL_CENTER)]
+            else:
+                comp_cells = [
+                    Paragraph(f"<b>{position}.</b> {_text(comp.get('component_name'))}", CELL),
+                    Paragraph(_text(comp.get('starting_date'), '-'), CELL_BOLD_CENTER),
+                ]
+            if position == 1:
+                rows.append([
+                    Paragraph(str(index), CELL_CENTER),
+                    Paragraph(_text(scheme.get('gs_no')), CELL_CENTER),
+                    Paragraph(_text(scheme.get('name_of_scheme')), CELL_BOLD),
+                    *comp_cells,
+                    Paragraph(f"{_text(scheme.get('physical_progress'), '0')}%", CELL_BOLD_CENTER),
+                    Paragraph(_text(scheme.get('total_allocation'), '-'), CELL_CENTER),
+                    Paragraph(_text(scheme.get('funds_released'), '-'), CELL_CENTER),
+                    Paragraph(_text(scheme.get('committed_fund_utilization'), '-'), CELL_CENTER),
+                    Paragraph(_text(scheme.get('labour_deployed'), '0'), CELL_CENTER),
+                    Paragraph(_text(scheme.get('remarks')), CELL),
+                ])
+            else:
+                rows.append(['', '', '', *comp_cells] + [''] * 6)
+
+        # Component rows of one scheme share borders only at the block's edges
+        for column in range(len(COLUMNS)):
+            if column in SCHEME_COLUMNS and last > first:
+                style.append(('SPAN', (column, first), (column, last)))
+            style.append(('BOX', (column, first), (column, last), 1, colors.black))
+
+    return Table(
+        rows,
+        colWidths=_column_widths(available_width),
+        repeatRows=3,
+        style=TableStyle(style),
+        splitByRow=True,
+    )
+
+
+class ImagePage(Flowable):
+    """One before/after pair page, drawn straight onto the canvas"""
+
+    def __init__(self, comp: Dict, scheme: Dict, pair: tuple, page_number: int, today: str):
+        super().__init__()
+        self.comp = comp
+        self.scheme = scheme
+        self.pair = pair
+        self.page_number = page_number
+        self.today = today
+
+    def wrap(self, available_width, available_height):
+        self.width, self.height = available_width, available_height
+        return self.width, self.height
+
+    def _draw_image(self, image: Optional[Dict], x: float, y: float, label: str, color, missing: str):
+        canvas = self.canv
+        canvas.setFont('Helvetica-Bold', 14)
+        canvas.setFillColor(color)
+        canvas.drawCentredString(x + IMAGE_BOX / 2, y + IMAGE_BOX + 20, label)
+        if image:
+            canvas.drawImage(
+                image['full_path'], x, y, IMAGE_BOX, IMAGE_BOX,
+                preserveAspectRatio=True, anchor='c', mask='auto'
+            )
+        else:
+            canvas.setFont('Helvetica-Oblique', 14)
+            canvas.setFillColor(NO_IMAGE)
+            canvas.drawCentredString(x + IMAGE_BOX / 2, y + IMAGE_BOX / 2, missing)
+
+    def draw(self):
+        canvas = self.canv
+        center = self.width / 2
+        top = self.height
+
+        canvas.setFillColor(HEADING)
+        canvas.setFont('Helvetica-Bold', 16)
+        canvas.drawCentredString(center, top - 18, str(self.comp.get('component_name') or ''))
+        canvas.setFillColor(MUTED)
+        canvas.setFont('Helvetica', 10)
+        canvas.drawCentredString(center, top - 34, f"Scheme: {self.scheme.get('name_of_scheme') or ''}")
+        canvas.setStrokeColor(HEADING)
+        canvas.setLineWidth(2)
+        canvas.line(0, top - 44, self.width, top - 44)
+
+        gap = (self.width - 2 * IMAGE_BOX) / 3
+        image_y = top - 44 - 30 - 30 - IMAGE_BOX
+        self._draw_image(self.pair[0], gap, image_y, "BEFORE WORK", BEFORE_COLOR, "No before image")
+        self._draw_image(self.pair[1], 2 * gap + IMAGE_BOX, image_y, "AFTER WORK", AFTER_COLOR, "No after image")
+
+        canvas.setFillColor(FOOTER)
+        canvas.setFont('Helvetica', 7)
+        canvas.drawCentredString(
+            center, image_y - 40,
+            f"Page {self.page_number} of component images - Generated on {self.today}"
+        )
+
+
+def _draw_cover(cover_image_path: str):
+    def on_page(canvas, doc):
+        canvas.drawImage(cover_image_path, 0, 0, PAGE_SIZE[0], PAGE_SIZE[1])
+    return on_page
+
+
+def build(context: Dict[str, Any], output: BinaryIO):
+    """
+    Render the report.html context straight to PDF with ReportLab platypus
+
+    Honours the same `sections` subset as the template, so it can render
+    whole reports and report_fragments fragments alike.
+
+    Args:
+        context: report_data.report_context output, optionally with `sections`
+        output: Binary file the PDF is written to
+    """
+    sections = context.get('sections') or ['cover', 'summary', 'images']
+    schemes = context['schemes']
+    today = context['today']
+
+    doc = BaseDocTemplate(output, pagesize=PAGE_SIZE, leftMargin=MARGIN, rightMargin=MARGIN,
+                          topMargin=MARGIN, bottomMargin=MARGIN)
+    content_frame = Frame(MARGIN, MARGIN, PAGE_SIZE[0] - 2 * MARGIN, PAGE_SIZE[1] - 2 * MARGIN, id='content',
+                          leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+    templates = [PageTemplate(id='content', frames=[content_frame])]
+    story = []
+
+    if 'cover' in sections:
+        templates.insert(0, PageTemplate(
+            id='cover',
+            frames=[Frame(0, 0, PAGE_SIZE[0], PAGE_SIZE[1], id='cover')],
+            onPage=_draw_cover(context['cover_image_path'])
+        ))
+        story += [Spacer(1, 1), NextPageTemplate('content')]
+    doc.addPageTemplates(templates)
+
+    if 'summary' in sections:
+        if story:
+            story.append(PageBreak())
+        story.append(summary_table(schemes, today, content_frame._width))
+
+    if 'images' in sections:
+        for scheme in schemes:
+            for comp in scheme['components']:
+                if not comp.get('is_active', True):
+                    continue
+                for page_number, pair in enumerate(comp['image_pairs'], start=1):
+                    if story:
+                        story.append(PageBreak())
+                    story.append(ImagePage(comp, scheme, pair, page_number, today))
+
+    if not story:
+        story.append(Spacer(1, 1))
+    doc.build(story)
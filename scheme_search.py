@@ -0,0 +1,135 @@
+import re
+from typing import Optional, List, Dict, Tuple
+
+import database
+
+# (table, index name, columns) - MATCH() column lists must equal an index's columns
+FULLTEXT_INDEXES = [
+    ("scheme", "ft_scheme_text", "name_of_scheme, remarks"),
+    ("component", "ft_component_name", "component_name"),
+]
+
+# InnoDB's default stopword list; these are never indexed, so requiring them matches nothing
+STOPWORDS = {
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how",
+    "i", "in", "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "who", "will", "with", "und", "www",
+}
+
+# Scheme name/remarks matches outrank component name matches
+SCHEME_WEIGHT = 2
+
+# Set at startup once the FULLTEXT index migration is applied; False falls back to LIKE scans
+available = False
+
+
+async def ensure_indexes():
+    """Create the FULLTEXT indexes used by search if they don't exist"""
+    for table, name, columns in FULLTEXT_INDEXES:
+        existing = await database.fetch_all(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+        if not existing:
+            await database.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns})")
+            print(f"✅ Created FULLTEXT index {name} on {table}")
+
+
+def boolean_query(text: str) -> Optional[str]:
+    """
+    Turn free text into a BOOLEAN MODE query requiring every word as a prefix
+
+    'dharabi da' -> '+dharabi* +da*'. Returns None when nothing indexable is
+    left (single characters and stopwords only).
+    """
+    words = [w for w in re.findall(r"\w+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+    if not words:
+        return None
+    return " ".join(f"+{w}*" for w in dict.fromkeys(words))
+
+
+def _gs_no(text: str) -> Optional[int]:
+    text = text.strip().lstrip('#')
+    return int(text) if text.isdigit() else None
+
+
+def filter_condition(text: str) -> Tuple[str, list]:
+    """
+    WHERE condition on the scheme table matching a search box value
+
+    Matches scheme name, remarks, component names or an exact GS number.
+    Uses the FULLTEXT indexes when possible, otherwise substring LIKE.
+
+    Returns:
+        Tuple of (SQL condition, params)
+    """
+    query = boolean_query(text) if available else None
+    gs_no = _gs_no(text)
+
+    if query:
+        # The derived table is materialized once, so both MATCHes use their index
+        # instead of being evaluated row by row as they would be under an OR
+        matches = (
+            "SELECT gs_no FROM scheme WHERE MATCH(name_of_scheme, remarks) AGAINST (%s IN BOOLEAN MODE)"
+            " UNION SELECT gs_no FROM component WHERE MATCH(component_name) AGAINST (%s IN BOOLEAN MODE)"
+        )
+        params = [query, query]
+        if gs_no is not None:
+            matches += " UNION SELECT gs_no FROM scheme WHERE gs_no = %s"
+            params.append(gs_no)
+        return f"gs_no IN (SELECT gs_no FROM ({matches}) hits)", params
+
+    pattern = f"%{text}%"
+    condition = (
+        "(name_of_scheme LIKE %s OR remarks LIKE %s"
+        " OR gs_no IN (SELECT gs_no FROM component WHERE component_name LIKE %s)"
+    )
+    params = [pattern, pattern, pattern]
+    if gs_no is not None:
+        condition += " OR gs_no = %s"
+        params.append(gs_no)
+    return condition + ")", params
+
+
+async def search(text: str, limit: int = 20) -> List[Dict]:
+    """
+    Ranked scheme search
+
+    Each scheme's score is its weighted name/remarks relevance plus the
+    relevance of its matching components; an exact GS number ranks first.
+
+    Returns:
+        Scheme rows with an added 'score', best match first
+    """
+    query = boolean_query(text) if available else None
+    if query is None:
+        condition, params = filter_condition(text)
+        return await database.fetch_all(
+            f"SELECT *, 0 AS score FROM scheme WHERE {condition} ORDER BY gs_no LIMIT %s",
+            tuple(params + [limit])
+        )
+
+    matches = [
+        f"SELECT gs_no, MATCH(name_of_scheme, remarks) AGAINST (%s IN BOOLEAN MODE) * {SCHEME_WEIGHT} AS score"
+        " FROM scheme WHERE MATCH(name_of_scheme, remarks) AGAINST (%s IN BOOLEAN MODE)",
+        "SELECT gs_no, MATCH(component_name) AGAINST (%s IN BOOLEAN MODE) AS score"
+        " FROM component WHERE gs_no IS NOT NULL AND MATCH(component_name) AGAINST (%s IN BOOLEAN MODE)",
+    ]
+    params = [query, query, query, query]
+
+    gs_no = _gs_no(text)
+    if gs_no is not None:
+        matches.append("SELECT gs_no, 1000 AS score FROM scheme WHERE gs_no = %s")
+        params.append(gs_no)
+
+    return await database.fetch_all(
+        f"""
+            SELECT s.*, hits.score
+            FROM (
+                SELECT gs_no, SUM(score) AS score
+                FROM ({' UNION ALL '.join(matches)}) matches
+                GROUP BY gs_no
+            ) hits
+            JOIN scheme s ON s.gs_no = hits.gs_no
+            ORDER BY hits.score DESC, s.gs_no
+            LIMIT %s
+        """,
+        tuple(params + [limit])
+    )
@@ -0,0 +1,262 @@
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Optional, List, Dict, Any
+
+import database
+import http_client
+import report_cache
+import report_data
+from config import SMDP_SYNC_PAGE_SIZE, SMDP_SYNC_PAGE_CONCURRENCY, SMDP_SYNC_BATCH_SIZE
+from smdp_api import EXTERNAL_API_URL, HEADERS, grid_params
+
+# scheme column -> SMDP grid keys to read it from, first present key wins.
+# Only these columns are synced; sr_no, labour_deployed and remarks stay local.
+SMDP_FIELD_MAP = {
+    'gs_no': ['gsNo', 'GSNo', 'gs_no'],
+    'name_of_scheme': ['name', 'schemeName', 'projectName', 'name_of_scheme'],
+    'physical_progress': ['physicalProgress', 'physicalProgressPercent', 'physical_progress'],
+    'total_allocation': ['revisedAllocation', 'allocation', 'total_allocation'],
+    'funds_released': ['financeReleaseFD', 'releaseByPD', 'funds_released'],
+    'committed_fund_utilization': ['utilication', 'utilization', 'committed_fund_utilization'],
+}
+
+SYNCED_COLUMNS = [column for column in SMDP_FIELD_MAP if column != 'gs_no']
+
+# Column precision from db.sql, used to compare values the way MySQL stores them
+DECIMAL_COLUMNS = {
+    'physical_progress': Decimal('0.01'),
+    'total_allocation': Decimal('0.01'),
+    'funds_released': Decimal('0.01'),
+    'committed_fund_utilization': Decimal('0.01'),
+}
+
+# Status of the current or last sync run
+status: Dict[str, Any] = {"state": "idle"}
+_task: Optional[asyncio.Task] = None
+
+
+def _pick(row: Dict, keys: List[str]) -> Any:
+    for key in keys:
+        if key in row and row[key] not in (None, ''):
+            return row[key]
+    return None
+
+
+def _to_decimal(value: Any, quantum: Decimal) -> Optional[Decimal]:
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value).replace(',', '').strip().rstrip('%')).quantize(quantum)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def map_row(row: Dict) -> Optional[Dict]:
+    """Map one SMDP grid row to scheme columns (SchemeCreate field names), None if it has no GS number"""
+    gs_no = _pick(row, SMDP_FIELD_MAP['gs_no'])
+    try:
+        gs_no = int(str(gs_no).strip())
+    except (TypeError, ValueError):
+        return None
+
+    mapped = {'gs_no': gs_no}
+    for column in SYNCED_COLUMNS:
+        value = _pick(row, SMDP_FIELD_MAP[column])
+        if column in DECIMAL_COLUMNS:
+            value = _to_decimal(value, DECIMAL_COLUMNS[column])
+        elif value is not None:
+            value = str(value).strip()[:255]
+        mapped[column] = value
+    return mapped
+
+
+def _grid_rows(payload: Any) -> List[Dict]:
+    if isinstance(payload, dict):
+        for key in ('rows', 'data', 'Data'):
+            if isinstance(payload.get(key), list):
+                return payload[key]
+    return payload if isinstance(payload, list) else []
+
+
+def _grid_total_pages(payload: Any) -> int:
+    if isinstance(payload, dict):
+        for key in ('total', 'totalPages', 'TotalPages'):
+            try:
+                return int(payload[key])
+            except (KeyError, TypeError, ValueError):
+                continue
+    return 1
+
+
+async def fetch_page(page: int, rows: int = SMDP_SYNC_PAGE_SIZE) -> Any:
+    """Fetch one page of the SMDP project grid (bypassing the proxy cache)"""
+    status_code, payload = await http_client.fetch_json(
+        "smdp", "GET", EXTERNAL_API_URL,
+        params=grid_params("", page, rows),
+        headers=HEADERS,
+        ttl=0
+    )
+    if status_code != 200:
+        raise RuntimeError(f"SMDP page {page} returned HTTP {status_code}")
+    return payload
+
+
+def _changed(mapped: Dict, existing: Dict) -> bool:
+    for column in SYNCED_COLUMNS:
+        old = existing.get(column)
+        if column in DECIMAL_COLUMNS and old is not None:
+            old = Decimal(old).quantize(DECIMAL_COLUMNS[column])
+        if mapped[column] != old:
+            return True
+    return False
+
+
+async def upsert_schemes(mapped_rows: List[Dict]) -> Dict[str, int]:
+    """
+    Insert new schemes and update changed ones, skipping unchanged rows
+
+    Returns:
+        Counts of inserted, updated and unchanged rows
+    """
+    # Last row wins if the upstream repeats a GS number
+    by_gs_no = {row['gs_no']: row for row in mapped_rows}
+    columns = ', '.join(['gs_no'] + SYNCED_COLUMNS)
+    existing_rows = await report_data.fetch_in_batches(
+        f"SELECT {columns} FROM scheme WHERE gs_no IN ({{ids}})",
+        list(by_gs_no)
+    )
+    existing = {row['gs_no']: row for row in existing_rows}
+
+    to_write = []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for gs_no, row in by_gs_no.items():
+        if gs_no not in existing:
+            counts["inserted"] += 1
+        elif _changed(row, existing[gs_no]):
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+            continue
+        to_write.append(tuple(row[c] for c in ['gs_no'] + SYNCED_COLUMNS))
+
+    query = f"""
+        INSERT INTO scheme ({columns})
+        VALUES ({', '.join(['%s'] * (len(SYNCED_COLUMNS) + 1))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in SYNCED_COLUMNS)}
+    """
+    for start in range(0, len(to_write), SMDP_SYNC_BATCH_SIZE):
+        await database.execute_many(query, to_write[start:start + SMDP_SYNC_BATCH_SIZE])
+    return counts
+
+
+def _reset_status():
+    """Replace the last run's status with a fresh running one"""
+    global status
+    status = {
+        "state": "running",
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "finished_at": None,
+        "pages_fetched": 0,
+        "total_pages": None,
+        "rows_seen": 0,
+        "invalid_rows": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "fetch_seconds": 0.0,
+        "write_seconds": 0.0,
+        "elapsed_seconds": 0.0,
+        "error": None,
+    }
+
+
+async def run_sync(page_size: int = SMDP_SYNC_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Page through the SMDP project grid and upsert every scheme
+
+    Returns:
+        Final status with page, row and timing metrics
+    """
+    _reset_status()
+    return await _run(page_size)
+
+
+async def _run(page_size: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+
+    async def process(payload: Any):
+        rows = _grid_rows(payload)
+        mapped = [m for m in (map_row(r) for r in rows) if m]
+        status["pages_fetched"] += 1
+        status["rows_seen"] += len(rows)
+        status["invalid_rows"] += len(rows) - len(mapped)
+
+        write_start = time.perf_counter()
+        counts = await upsert_schemes(mapped) if mapped else {}
+        status["write_seconds"] += time.perf_counter() - write_start
+        for key, value in counts.items():
+            status[key] += value
+
+    async def timed_fetch(page: int) -> Any:
+        fetch_start = time.perf_counter()
+        payload = await fetch_page(page, page_size)
+        status["fetch_seconds"] += time.perf_counter() - fetch_start
+        return payload
+
+    try:
+        first = await timed_fetch(1)
+        status["total_pages"] = _grid_total_pages(first)
+        await process(first)
+
+        # Fetch the remaining pages a window at a time
+        pages = list(range(2, status["total_pages"] + 1))
+        for start in range(0, len(pages), SMDP_SYNC_PAGE_CONCURRENCY):
+            window = pages[start:start + SMDP_SYNC_PAGE_CONCURRENCY]
+            payloads = await asyncio.gather(*(timed_fetch(p) for p in window))
+            for payload in payloads:
+                await process(payload)
+
+        status["state"] = "completed"
+    except Exception as e:
+        status["state"] = "failed"
+        status["error"] = str(e)
+        print(f"❌ SMDP scheme sync failed: {e}")
+    finally:
+        if status["inserted"] or status["updated"]:
+            await report_cache.bump_version()
+        status["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        status["fetch_seconds"] = round(status["fetch_seconds"], 3)
+        status["write_seconds"] = round(status["write_seconds"], 3)
+        status["finished_at"] = datetime.now().isoformat(timespec='seconds')
+
+    print(
+        f"🔄 SMDP scheme sync {status['state']}: {status['rows_seen']} rows, "
+        f"{status['inserted']} inserted, {status['updated']} updated, "
+        f"{status['unchanged']} unchanged in {status['elapsed_seconds']}s"
+    )
+    return status
+
+
+def start_sync(page_size: int = SMDP_SYNC_PAGE_SIZE) -> bool:
+    """Start a sync in the background; False if one is already running"""
+    global _task
+    if _task and not _task.done():
+        return False
+    # Reset now so callers see the new run, not the previous one, right away
+    _reset_status()
+    _task = asyncio.create_task(_run(page_size))
+    return True
+
+
+if __name__ == '__main__':
+    async def _main():
+        await database.create_pool()
+        try:
+            await run_sync()
+        finally:
+            await http_client.close_clients()
+            await database.close_pool()
+
+    asyncio.run(_main())
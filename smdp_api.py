@@ -0,0 +1,72 @@
+#this is SMDP API
+BEARER_TOKEN = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+    "eyJ1bmlxdWVfbmFtZSI6InNvLmRldi50b3VyIiwi"
+    "Q2xpZW50SVAiOiIxMTYuOTAuMTI1LjEzNCIsIm5iZiI6"
+    "MTc3MDU3NDgxNSwiZXhwIjoxNzcwNjYxMjE1LCJpYXQi"
+    "OjE3NzA1NzQ4MTV9."
+    "qAMV2EeOE_Cvty9bv8zRAVrXbE2X3ZsoMgkWi2lm6Rw"
+)
+
+EXTERNAL_API_URL = (
+    "https://smdpservice.punjab.gov.pk/api/"
+    "MPRGraphDashboard/GetADPDashBoardProjectListGridData"
+)
+
+# ============== COMMON HEADERS ==============
+
+HEADERS = {
+    "Authorization": f"Bearer {BEARER_TOKEN}",
+    "Accept": "application/json",
+    "User-Agent": "Mozilla/5.0",
+    "Referer": "https://smdpservice.punjab.gov.pk/",
+    "Origin": "https://smdpservice.punjab.gov.pk"
+}
+
+
+def grid_params(search_text: str = "", page: int = 1, rows: int = 50) -> dict:
+    """Query parameters for the ADP dashboard project grid (jqGrid paging via page/rows)"""
+    return {
+        "financialYearId": "12",
+        "userID": "2127",
+        "sectorID": "null",
+        "subSectorID": "null",
+        "divisionID": "null",
+        "districtID": "null",
+        "constituencyID": "null",
+        "tehsilID": "null",
+        "ppID": "null",
+        "userTypeID": "3",
+        "reportTypeID": "0",
+        "reportProposedTypeID": "0",
+        "reportSubTypeID": "0",
+        "DraftStatusID": "0",
+        "departmentID": "null",
+        "schemeTypeID": "null",
+        "schemeSubTypeID": "null",
+        "percentageStart": "0",
+        "percentageEnd": "0",
+        "statusTypeID": "null",
+        "fundingCostType": "null",
+        "approvalStatus": "",
+        "isFullyFunded": "false",
+        "regionID": "null",
+        "approvalStatusCatFilterID": "null",
+        "regionIdCSV": "",
+        "ExecutingAgencyIdCSV": "",
+        "SponsorAgencyIdCSV": "",
+        "deptGroupID": "null",
+        "searchText": search_text,
+        "FilterID": "null",
+        "isOnGoing": "false",
+        "onGoingRangeCategoryID": "null",
+        "fullyFundedCategoryID": "null",
+        "IsCompleteProgress": "false",
+        "CompleteProgressRangeCategoryID": "null",
+        "_search": "false",
+        "rows": str(rows),
+        "page": str(page),
+        "sidx": "gsNo",
+        "sord": "asc",
+        "nd": "1770575180022"
+    }
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import Optional, Dict, Any, Tuple
+
+import database
+import report_cache
+from config import STATS_CACHE_TTL
+
+# (label, lower bound inclusive, upper bound exclusive) for physical_progress
+PROGRESS_BUCKETS = [
+    ("0-25", 0, 25),
+    ("25-50", 25, 50),
+    ("50-75", 50, 75),
+    ("75-100", 75, 100),
+    ("100", 100, None),
+]
+
+AGGREGATES = """
+    COUNT(*) AS scheme_count,
+    SUM(total_allocation) AS total_allocation,
+    SUM(funds_released) AS funds_released,
+    SUM(committed_fund_utilization) AS committed_fund_utilization,
+    AVG(physical_progress) AS avg_physical_progress
+"""
+
+# (data version, expires at, stats)
+_cache: Optional[Tuple[Optional[int], float, Dict[str, Any]]] = None
+
+
+def _bucket_case() -> str:
+    cases = []
+    for label, low, high in PROGRESS_BUCKETS:
+        condition = f"physical_progress >= {low}" if high is None else f"physical_progress < {high}"
+        cases.append(f"WHEN {condition} THEN '{label}'")
+    # NULL progress fails every comparison and lands in 'unknown'
+    return f"CASE {' '.join(cases)} ELSE 'unknown' END"
+
+
+def _percent(part: Optional[Decimal], whole: Optional[Decimal]) -> Optional[float]:
+    if not part or not whole:
+        return None
+    return round(float(part) / float(whole) * 100, 2)
+
+
+def _money_totals(row: Dict) -> Dict[str, Any]:
+    return {
+        "total_allocation": row["total_allocation"] or 0,
+        "funds_released": row["funds_released"] or 0,
+        "committed_fund_utilization": row["committed_fund_utilization"] or 0,
+        "utilization_percent": _percent(row["committed_fund_utilization"], row["funds_released"]),
+        "avg_physical_progress": round(float(row["avg_physical_progress"]), 2) if row["avg_physical_progress"] is not None else None,
+    }
+
+
+async def compute() -> Dict[str, Any]:
+    """Run the portfolio aggregations in SQL"""
+    overall, components, buckets = await asyncio.gather(
+        database.fetch_one(f"""
+            SELECT {AGGREGATES},
+                SUM(labour_deployed) AS labour_deployed,
+                SUM(physical_progress >= 100) AS completed_schemes
+            FROM scheme
+        """),
+        database.fetch_one("""
+            SELECT
+                COUNT(*) AS component_count,
+                SUM(is_active) AS active_components,
+                COUNT(DISTINCT gs_no) AS schemes_with_components
+            FROM component
+        """),
+        database.fetch_all(f"SELECT {_bucket_case()} AS bucket, {AGGREGATES} FROM scheme GROUP BY bucket"),
+    )
+
+    by_label = {row["bucket"]: row for row in buckets}
+    progress_buckets = []
+    for label in [b[0] for b in PROGRESS_BUCKETS] + ["unknown"]:
+        row = by_label.get(label)
+        if row is None and label == "unknown":
+            continue
+        row = row or {"scheme_count": 0, "total_allocation": None, "funds_released": None,
+                      "committed_fund_utilization": None, "avg_physical_progress": None}
+        progress_buckets.append({"bucket": label, "scheme_count": row["scheme_count"], **_money_totals(row)})
+
+    return {
+        "schemes": {
+            "scheme_count": overall["scheme_count"],
+            "completed_schemes": int(overall["completed_schemes"] or 0),
+            "labour_deployed": int(overall["labour_deployed"] or 0),
+            **_money_totals(overall),
+        },
+        "components": {
+            "component_count": components["component_count"],
+            "active_components": int(components["active_components"] or 0),
+            "schemes_with_components": components["schemes_with_components"],
+        },
+        "progress_buckets": progress_buckets,
+    }
+
+
+async def get_stats() -> Dict[str, Any]:
+    """
+    Portfolio statistics, cached until the data version changes or
+    STATS_CACHE_TTL expires (covers writes made outside the API)
+    """
+    global _cache
+    version = await report_cache.get_version()
+    now = time.monotonic()
+    if _cache and _cache[0] == version and now < _cache[1]:
+        return _cache[2]
+
+    result = await compute()
+    _cache = (version, now + STATS_CACHE_TTL, result)
+    return result
@@ -0,0 +1,152 @@
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response, FileResponse
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+import image_renditions
+from config import RENDITIONS_DIRNAME, VARIANTS_DIRNAME, UPLOAD_CACHE_MAX_AGE, RENDITION_CACHE_MAX_AGE, DOWNLOAD_CHUNK_SIZE
+
+# Accept media type -> variant format, in order of preference
+VARIANT_MEDIA_TYPES = [('image/avif', 'avif'), ('image/webp', 'webp')]
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def accepted_variant(accept: str) -> Optional[str]:
+    """Best variant format the client accepts (explicitly, with q > 0)"""
+    accepted = set()
+    for part in accept.lower().split(','):
+        media_type, _, params = part.strip().partition(';')
+        quality = re.search(r"q=([0-9.]+)", params)
+        if quality is None or float(quality.group(1) or 0) > 0:
+            accepted.add(media_type.strip())
+    for media_type, fmt in VARIANT_MEDIA_TYPES:
+        if media_type in accepted and fmt in image_renditions.VARIANT_FORMATS:
+            return fmt
+    return None
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range
+
+    Returns None for headers to ignore (multiple ranges, other units) and
+    raises ValueError for unsatisfiable ranges.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """206 response sending one byte range of a file in chunks"""
+
+    def __init__(self, path: Path, start: int, end: int, size: int, headers: dict, media_type: str, send_body: bool):
+        super().__init__(status_code=206, headers={
+            **headers,
+            "content-range": f"bytes {start}-{end}/{size}",
+            "content-length": str(end - start + 1),
+        }, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_body = send_body
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles for uploads/ with long-lived caching
+
+    - Strong ETags and If-None-Match -> 304
+    - `Cache-Control: immutable` for originals (content-named, never
+      rewritten); a shorter max-age for renditions, which are regenerated
+      when rendition settings change
+    - Single byte ranges (206/416, If-Range)
+    - AVIF/WebP variants from image_renditions when the Accept header allows
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path = Path(full_path)
+        media_type = None
+        headers = {"accept-ranges": "bytes"}
+
+        if path.suffix.lower() in image_renditions.VARIANT_SOURCE_SUFFIXES and path.parent.name != VARIANTS_DIRNAME:
+            headers["vary"] = "Accept"
+            fmt = accepted_variant(request_headers.get("accept", ""))
+            if fmt:
+                variant = image_renditions.variant_path(path, fmt)
+                try:
+                    stat_result = os.stat(variant)
+                    path, media_type = variant, f"image/{fmt}"
+                except FileNotFoundError:
+                    pass
+
+        is_rendition = RENDITIONS_DIRNAME in path.parts
+        headers["cache-control"] = (
+            f"public, max-age={RENDITION_CACHE_MAX_AGE}" if is_rendition
+            else f"public, max-age={UPLOAD_CACHE_MAX_AGE}, immutable"
+        )
+        size = stat_result.st_size
+        # Originals are content-named and renditions/variants derive from them, so
+        # name + size identify the bytes (mtime differs between workers' copies)
+        etag = f'"{path.name}-{size:x}"'
+        headers["etag"] = etag
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(',')]):
+            return Response(status_code=304, headers=headers)
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+            if byte_range:
+                return FileRangeResponse(
+                    path, byte_range[0], byte_range[1], size, headers,
+                    media_type or guess_type(path.name)[0] or "application/octet-stream", scope["method"] != "HEAD"
+                )
+
+        return FileResponse(path, status_code=status_code, stat_result=stat_result, headers=headers, media_type=media_type)
+
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE
+
+# Max size of a non-file form field
+MAX_FIELD_SIZE = 64 * 1024
+
+# Allowance for multipart boundaries and part headers when checking Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Extensions stored under one canonical spelling, so identical content dedups to one file
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+class UploadError(Exception):
+    """Raised when a multipart upload is rejected"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def size_error_message(max_file_size: int = MAX_FILE_SIZE) -> str:
+    """Error message for files over the size limit"""
+    return f"File size exceeds maximum allowed size of {max_file_size / (1024*1024)}MB"
+
+
+def allowed_file(filename: str) -> bool:
+    """Check if file extension is allowed"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+class _MultipartReceiver:
+    """
+    Streams multipart file parts straight to disk.
+
+    Parser callbacks only collect data; the event loop hands the collected
+    chunks to a worker thread after each network chunk, so the full upload
+    is never held in memory and disk writes never block the loop.
+    """
+
+    def __init__(self, file_fields: Dict[str, Path], max_file_size: int, abort_on_error: bool):
+        self.file_fields = file_fields
+        self.max_file_size = max_file_size
+        self.abort_on_error = abort_on_error
+
+        self.files: List[Dict] = []
+        self.fields: Dict[str, str] = {}
+
+        self._header_field = b''
+        self._header_value = b''
+        self._headers: Dict[bytes, bytes] = {}
+        self._part: Optional[Dict] = None
+        self._pending: List[Tuple[Dict, bytes]] = []
+        self._finished: List[Dict] = []
+
+    # ----- parser callbacks -----
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._part = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        name = options.get(b'name', b'').decode('utf-8', 'replace')
+        filename = options.get(b'filename')
+
+        if filename is None:
+            self._part = {"kind": "field", "name": name, "value": b''}
+            return
+
+        filename = filename.decode('utf-8', 'replace')
+        part = {
+            "kind": "file",
+            "field": name,
+            "original_filename": filename,
+            "size": 0,
+            "error": None,
+            "handle": None,
+        }
+        self._part = part
+        self.files.append(part)
+
+        if name not in self.file_fields:
+            self._reject(part, f"Unexpected file field '{name}'")
+        elif not filename:
+            self._reject(part, "No file provided")
+        elif not allowed_file(filename):
+            self._reject(part, f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}")
+        else:
+            # Final name is the content hash, known once the part is complete
+            extension = filename.rsplit('.', 1)[1].lower()
+            part["extension"] = EXTENSION_ALIASES.get(extension, extension)
+            part["destination"] = self.file_fields[name]
+            part["tmp_path"] = part["destination"] / f".{uuid.uuid4()}.part"
+            part["hasher"] = hashlib.sha256()
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        part = self._part
+        if part is None:
+            return
+        if part["kind"] == "field":
+            part["value"] += data[start:end]
+            if len(part["value"]) > MAX_FIELD_SIZE:
+                raise UploadError(f"Form field '{part['name']}' is too large")
+            return
+        if part["error"]:
+            return
+        part["size"] += end - start
+        if part["size"] > self.max_file_size:
+            self._reject(part, size_error_message(self.max_file_size), status_code=413)
+            return
+        self._pending.append((part, bytes(data[start:end])))
+
+    def on_part_end(self):
+        part = self._part
+        if part is None:
+            return
+        if part["kind"] == "field":
+            self.fields[part["name"]] = part["value"].decode('utf-8', 'replace')
+        elif not part["error"]:
+            self._finished.append(part)
+        self._part = None
+
+    def _reject(self, part: Dict, message: str, status_code: int = 400):
+        part["error"] = message
+        # Drop anything buffered for this part; the temp file is removed on flush
+        self._pending = [(p, d) for p, d in self._pending if p is not part]
+        self._finished.append(part)
+        if self.abort_on_error:
+            raise UploadError(message, status_code=status_code)
+
+    # ----- disk I/O (runs in a worker thread) -----
+
+    def flush(self):
+        """Write buffered chunks and finalize completed parts"""
+        pending, self._pending = self._pending, []
+        finished, self._finished = self._finished, []
+
+        for part, data in pending:
+            if part["handle"] is None:
+                part["handle"] = open(part["tmp_path"], "wb")
+            part["handle"].write(data)
+            part["hasher"].update(data)
+
+        for part in finished:
+            if part["error"]:
+                self._discard(part)
+                continue
+            if part["handle"] is None:
+                # Empty file: nothing was written yet
+                part["handle"] = open(part["tmp_path"], "wb")
+            part["handle"].close()
+            part["handle"] = None
+
+            part["sha256"] = part["hasher"].hexdigest()
+            part["filename"] = f"{part['sha256']}.{part['extension']}"
+            part["path"] = part["destination"] / part["filename"]
+            if part["path"].exists():
+                # Identical content is already stored; share that file
+                os.unlink(part["tmp_path"])
+                part["duplicate"] = True
+            else:
+                # Atomic publish: readers never see a partially written file
+                os.replace(part["tmp_path"], part["path"])
+                part["duplicate"] = False
+                part["published"] = True
+
+    def _discard(self, part: Dict):
+        if part.get("handle") is not None:
+            part["handle"].close()
+            part["handle"] = None
+        if part.get("tmp_path"):
+            try:
+                os.unlink(part["tmp_path"])
+            except FileNotFoundError:
+                pass
+
+    def cleanup(self):
+        """Remove every file written by an aborted request"""
+        for part in self.files:
+            self._discard(part)
+            if part.get("published"):
+                try:
+                    os.unlink(part["path"])
+                except FileNotFoundError:
+                    pass
+
+
+async def receive_files(
+    request,
+    file_fields: Dict[str, Path],
+    max_file_size: int = MAX_FILE_SIZE,
+    max_files: int = 1,
+    abort_on_error: bool = True
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    Stream a multipart/form-data request body to disk
+
+    Args:
+        request: Starlette request whose body hasn't been read
+        file_fields: Form field name -> directory files of that field are saved in
+        max_file_size: Per-file size limit, enforced while streaming
+        max_files: Max number of file parts, used to reject oversized
+            requests from Content-Length before reading the body
+        abort_on_error: Stop reading and raise on the first rejected file
+            instead of recording the error on that file and continuing
+
+    Returns:
+        Tuple of (file results, text form fields). Each file result has
+        field, original_filename, size and either error or filename, path,
+        sha256 and duplicate (True if identical content was already stored).
+        Files are named by their sha256, so re-uploads share one file.
+    """
+    content_type, params = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in params:
+        raise UploadError("Expected a multipart/form-data request")
+
+    content_length = request.headers.get('content-length')
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_file_size * max_files + MULTIPART_OVERHEAD * max(max_files, 1):
+            raise UploadError(size_error_message(max_file_size), status_code=413)
+
+    receiver = _MultipartReceiver(file_fields, max_file_size, abort_on_error)
+    parser = MultipartParser(params[b'boundary'], {
+        "on_part_begin": receiver.on_part_begin,
+        "on_part_data": receiver.on_part_data,
+        "on_part_end": receiver.on_part_end,
+        "on_header_field": receiver.on_header_field,
+        "on_header_value": receiver.on_header_value,
+        "on_header_end": receiver.on_header_end,
+        "on_headers_finished": receiver.on_headers_finished,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if len(receiver.files) > max_files:
+                raise UploadError(f"Too many files (max {max_files})")
+            if receiver._pending or receiver._finished:
+                await asyncio.to_thread(receiver.flush)
+        parser.finalize()
+        if receiver._pending or receiver._finished:
+            await asyncio.to_thread(receiver.flush)
+    except BaseException:
+        await asyncio.to_thread(receiver.cleanup)
+        raise
+
+    results = []
+    for part in receiver.files:
+        result = {
+            "field": part["field"],
+            "original_filename": part["original_filename"],
+            "size": part["size"],
+        }
+        if part["error"]:
+            result["error"] = part["error"]
+        else:
+            result["filename"] = part["filename"]
+            result["path"] = part["path"]
+            result["sha256"] = part["sha256"]
+            result["duplicate"] = part["duplicate"]
+        results.append(result)
+    return results, receiver.fields